@@ -0,0 +1,179 @@
+import io
+import os
+import json
+import hashlib
+import mimetypes
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+# ================================================================
+# Image mirror: every trainer_sprite / pokemon_images URL is downloaded
+# once into a content-addressed store (objects/ab/<sha256>.png, shared by
+# every URL with the same bytes) and recorded in manifest.json as
+#   url -> {path, sha256, bytes, etag, last_modified, sizes: {px: path}}
+# Mirrored URLs are skipped unless revalidate is set, in which case they
+# are re-requested conditionally and only replaced on a 200.
+# ================================================================
+ASSETS_DIR = "masters_dex_assets"
+ASSETS_VERSION = 1
+ASSET_WORKERS = 8
+
+def entry_image_urls(entry):
+    urls = []
+    for url in [entry.get('trainer_sprite', '')] + list(entry.get('pokemon_images') or []):
+        if url and url not in urls:
+            urls.append(url)
+    return urls
+
+def with_origin(url, origin):
+    # Fetch from a stand-in host (local server, mirror) while keeping the
+    # manifest keyed by the original URL.
+    if not origin:
+        return url
+    u = urlparse(url)
+    return origin.rstrip('/') + u.path + ('?' + u.query if u.query else '')
+
+def object_ext(url, content_type):
+    ext = os.path.splitext(urlparse(url).path)[1].lower()
+    if not ext and content_type:
+        ext = mimetypes.guess_extension(content_type.split(';')[0].strip()) or ''
+    return ext
+
+def write_object(root, sha, ext, data):
+    rel = os.path.join('objects', sha[:2], sha + ext)
+    path = os.path.join(root, rel)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Two URLs with the same bytes can land here at once.
+        tmp = path + "." + str(threading.get_ident()) + ".tmp"
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    return rel.replace(os.sep, '/')
+
+def make_derivatives(root, sha, ext, data, sizes):
+    # Downscaled copies (longest side = px), content-addressed by the source
+    # hash so they are only rendered once. Needs Pillow.
+    out = {}
+    if not sizes or Image is None:
+        return out
+    try:
+        src = Image.open(io.BytesIO(data))
+        src.load()
+    except Exception:
+        return out
+    for px in sizes:
+        rel = os.path.join('objects', sha[:2], sha + '-' + str(px) + ext).replace(os.sep, '/')
+        path = os.path.join(root, rel)
+        if not os.path.exists(path):
+            img = src.copy()
+            img.thumbnail((px, px))
+            buf = io.BytesIO()
+            img.save(buf, format=src.format or 'PNG')
+            tmp = path + ".tmp"
+            with open(tmp, 'wb') as f:
+                f.write(buf.getvalue())
+            os.replace(tmp, path)
+        out[str(px)] = rel
+    return out
+
+def load_manifest(root):
+    try:
+        with open(os.path.join(root, 'manifest.json'), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return manifest.get('urls', {}) if manifest.get('version') == ASSETS_VERSION else {}
+
+def save_manifest(root, urls):
+    path = os.path.join(root, 'manifest.json')
+    tmp = path + ".tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump({'version': ASSETS_VERSION, 'urls': dict(sorted(urls.items()))}, f,
+                  ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+
+def fetch_asset(url, known, client, throttle, root, origin):
+    # -> (status, record); status is 'new', 'not_modified' or 'failed'.
+    headers = {}
+    if known:
+        if known.get('etag'):
+            headers['If-None-Match'] = known['etag']
+        if known.get('last_modified'):
+            headers['If-Modified-Since'] = known['last_modified']
+    target = with_origin(url, origin)
+    try:
+        if throttle:
+            with throttle.slot(target):
+                res = client.get(target, headers=headers, use_cache=False)
+        else:
+            res = client.get(target, headers=headers, use_cache=False)
+    except Exception as e:
+        return 'failed', {'error': str(e)}
+    if res.status_code == 304 and known:
+        return 'not_modified', known
+    if res.status_code != 200:
+        return 'failed', {'error': 'HTTP ' + str(res.status_code)}
+    data = res.content
+    sha = hashlib.sha256(data).hexdigest()
+    ext = object_ext(url, res.headers.get('Content-Type'))
+    record = {
+        'path': write_object(root, sha, ext, data), 'sha256': sha, 'bytes': len(data),
+        'etag': res.headers.get('ETag'), 'last_modified': res.headers.get('Last-Modified'),
+    }
+    return 'new', record
+
+def mirror_assets(entries, client, throttle=None, root=ASSETS_DIR, workers=ASSET_WORKERS,
+                  revalidate=False, sizes=(), origin=None):
+    os.makedirs(root, exist_ok=True)
+    urls = load_manifest(root)
+    wanted = []
+    for entry in entries:
+        for url in entry_image_urls(entry):
+            if url not in wanted:
+                wanted.append(url)
+    if sizes and Image is None:
+        print("Assets: Pillow not installed, skipping derivative sizes")
+    todo = []
+    for url in wanted:
+        rec = urls.get(url)
+        present = rec and os.path.exists(os.path.join(root, rec['path']))
+        if revalidate or not present:
+            todo.append((url, rec if present else None))
+    counts = {'new': 0, 'not_modified': 0, 'failed': 0, 'skipped': len(wanted) - len(todo)}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {pool.submit(fetch_asset, url, known, client, throttle, root, origin): url
+                   for url, known in todo}
+        for fut in as_completed(futures):
+            url = futures[fut]
+            status, record = fut.result()
+            counts[status] += 1
+            if status == 'failed':
+                print("   Asset failed: " + url + " (" + record['error'] + ")")
+                rec = urls.get(url)
+                if rec and not os.path.exists(os.path.join(root, rec['path'])):
+                    del urls[url]
+            else:
+                urls[url] = record
+    if Image is not None:
+        for url in wanted:
+            rec = urls.get(url)
+            if not rec or not os.path.exists(os.path.join(root, rec['path'])):
+                continue
+            if any(str(px) not in rec.get('sizes', {}) for px in sizes):
+                with open(os.path.join(root, rec['path']), 'rb') as f:
+                    derived = make_derivatives(root, rec['sha256'], os.path.splitext(rec['path'])[1], f.read(), sizes)
+                if derived:
+                    rec['sizes'] = derived
+    save_manifest(root, urls)
+    objects = len({rec['sha256'] for rec in urls.values()})
+    print("Assets: " + str(counts['new']) + " downloaded, " + str(counts['not_modified']) + " not modified, "
+          + str(counts['skipped']) + " already mirrored, " + str(counts['failed']) + " failed; "
+          + str(len(urls)) + " URLs -> " + str(objects) + " files in " + root)
+    return counts
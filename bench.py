@@ -0,0 +1,373 @@
+import io
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import statistics
+import tracemalloc
+from contextlib import redirect_stdout
+from urllib.parse import quote, unquote, urlparse
+
+import scraper
+
+# ================================================================
+# Offline benchmark for the parsing pipeline. A corpus is a directory
+#   <corpus>/List_of_sync_pairs.html
+#   <corpus>/pages/<quoted page title>.html
+# either generated (--generate) or taken from the HTTP cache of a real
+# run (--from-cache). Results are written as JSON and can be compared
+# against a saved baseline; any timing slower than the baseline by more
+# than the threshold is a regression (exit status 1).
+#
+#   python bench.py --generate bench_corpus
+#   python bench.py bench_corpus --save-baseline bench_baseline.json
+#   python bench.py bench_corpus --baseline bench_baseline.json
+# ================================================================
+LIST_FILE = "List_of_sync_pairs.html"
+RESULTS_FILE = "bench_results.json"
+DEFAULT_THRESHOLD = 0.20
+MIN_COMPARE_SECONDS = 0.002
+TIMED_FUNCTIONS = (
+    'make_soup', 'parse_sync_pair_list', 'parse_trainer_page', 'parse_section_tables',
+    'classify_table', 'score_table', 'parse_stats_from_roundy', 'parse_info_from_roundy',
+    'parse_pokemon_images', 'parse_moves_table', 'parse_skills_table', 'parse_grid_table',
+    'SectionMatcher.__init__', 'SectionMatcher.match',
+)
+
+# ---------------------------------------------------------------- corpus
+TYPES = ('Fire', 'Water', 'Grass', 'Electric', 'Psychic', 'Dragon', 'Steel', 'Dark', 'Fairy', 'Ice')
+ROLES = ('Strike', 'Tech', 'Support', 'Field', 'Sprint')
+POKEMON = ('Pikachu', 'Charizard', 'Starmie', 'Psyduck', 'Snivy', 'Serperior', 'Garchomp', 'Lucario',
+           'Onix', 'Tyranitar', 'Gengar', 'Dragonite', 'Metagross', 'Sylveon', 'Lapras', 'Blaziken')
+
+def page_file(root, title):
+    return os.path.join(root, 'pages', quote(title, safe="()_,'-") + '.html')
+
+def gen_stats_table(rng, poke, ptype, weak, role):
+    nums = [str(rng.randint(150, 600)) for _ in range(6)]
+    slug = poke.replace(' ', '_')
+    return ('<table class="roundy"><tr><th colspan="7">' + poke + ' Stats [1]</th></tr>'
+            '<tr><td><img src="//archives.bulbagarden.net/media/upload/thumb/a/ab/Masters_' + slug
+            + '.png/120px-Masters_' + slug + '.png" width="120"></td>'
+            '<td><img src="//archives.bulbagarden.net/media/upload/thumb/1/12/IC_Masters.png/80px-IC_Masters.png" width="80"></td></tr>'
+            '<tr><th>Role</th><td>' + role + '</td></tr><tr><th>EX Role</th><td>Tech</td></tr>'
+            '<tr><th>Move type</th><td><a href="/wiki/' + ptype + '_(type)">' + ptype + '</a></td></tr>'
+            '<tr><th>Weakness</th><td><a href="/wiki/' + weak + '_(type)">' + weak + '</a></td></tr>'
+            '<tr><th>HP</th><th>Attack</th><th>Defense</th><th>Sp. Atk</th><th>Sp. Def</th><th>Speed</th></tr>'
+            '<tr><td>Lv. 120</td>' + ''.join('<td>' + n + '</td>' for n in nums) + '</tr>'
+            '<tr><td>Lv. 1</td>' + ''.join('<td>' + str(int(n) // 3) + '</td>' for n in nums) + '</tr></table>')
+
+def gen_moves_table(rng, poke, ptype):
+    rows = []
+    for k in range(rng.randint(2, 4)):
+        rows.append('<tr><td>' + poke + ' Move ' + str(k) + '</td><td>' + ptype + '</td><td>Special</td><td>'
+                    + str(rng.randint(1, 3)) + '</td><td>' + str(rng.randint(4, 20) * 10) + '</td><td>'
+                    + str(rng.randint(5, 24) * 10) + '</td><td>100</td><td>An opponent</td><td>Effect '
+                    + str(k) + '. [note]</td></tr>')
+    return ('<table class="roundy"><tr><th>Name</th><th>Type</th><th>Category</th><th>Move gauge</th>'
+            '<th>Base power</th><th>Max power</th><th>Accuracy</th><th>Target</th><th>Effect</th></tr>'
+            + ''.join(rows) + '<tr><td colspan="3">Sync move</td></tr><tr><td>' + poke + ' Sync Strike</td><td>'
+            + ptype + '</td><td>Special</td><td>-</td><td>200</td><td>250</td><td>-</td><td>An opponent</td>'
+            '<td>Big hit.</td></tr></table>')
+
+def gen_skills_table(poke):
+    return ('<table class="roundy"><tr><th colspan="2">Passive Skill</th></tr><tr><th>Name</th><th>Description</th></tr>'
+            '<tr><td>Critical Hit 1</td><td>Raises critical-hit rate of ' + poke + '.</td></tr>'
+            '<tr><td>Power Up 2</td><td>Raises power of moves.</td></tr>'
+            '<tr><th colspan="2">Theme Skill</th></tr><tr><td>Kanto: HP 10</td><td>Raises HP.</td></tr></table>')
+
+def gen_grid_table(rng, poke):
+    rows = ''.join('<tr><td>Tile ' + str(k) + '</td><td>Effect ' + str(k) + ' for ' + poke + '</td><td>'
+                   + str(k * 6) + '</td><td>' + str(k * 2) + '</td><td>' + str(k % 5 + 1) + '</td></tr>'
+                   for k in range(1, rng.randint(12, 40)))
+    return ('<table class="roundy sortable"><tr><th>Name</th><th>Effect</th><th>Energy required</th>'
+            '<th>Sync orb required</th><th>Move level required</th></tr>' + rows + '</table>')
+
+def gen_infobox(name, i):
+    return ('<table class="roundy infobox"><tr><td><b>' + name + ' Variant ' + str(i) + '</b></td></tr>'
+            '<tr><td><img src="//archives.bulbagarden.net/media/upload/thumb/b/bc/Spr_Masters_' + name + '_' + str(i)
+            + '.png/250px-Spr_Masters_' + name + '_' + str(i) + '.png" width="250"></td></tr></table>')
+
+def generate_corpus(root, trainers=120, seed=1):
+    # Deterministic pages shaped like Bulbapedia's: navigation and footer
+    # chrome, an infobox, one h2 section per pair with stats / moves /
+    # skills / sync grid / availability tables, and some unlisted sections.
+    rng = random.Random(seed)
+    os.makedirs(os.path.join(root, 'pages'), exist_ok=True)
+    list_rows = []
+    for ti in range(trainers):
+        name = 'Trainer' + str(ti)
+        title = name + '_(Masters)'
+        pokes = rng.sample(POKEMON, rng.randint(1, 4))
+        body = ['<div class="toc">contents</div>', gen_infobox(name, 0), '<p>Intro paragraph.</p>']
+        for pi, poke in enumerate(pokes):
+            ptype, weak = rng.sample(TYPES, 2)
+            role = rng.choice(ROLES)
+            body.append('<h2><span class="mw-headline" id="' + poke + '">' + poke + '</span></h2>')
+            if pi > 0:
+                body.append('<div>' + gen_infobox(name, pi) + '</div>')
+            body.append(gen_stats_table(rng, poke, ptype, weak, role))
+            body.append('<h3>Moves</h3>' + gen_moves_table(rng, poke, ptype))
+            body.append(gen_skills_table(poke))
+            body.append('<p>Sync grid</p>' + gen_grid_table(rng, poke))
+            body.append('<table class="roundy"><tr><th>Banner</th><th>Dates</th></tr><tr><td>Spotlight</td><td>2020</td></tr></table>')
+            if rng.random() < 0.1:
+                continue
+            prefix = '<small>Special Costume</small><br>' if rng.random() < 0.2 else ''
+            anchor = '#' + poke if pi > 0 else ''
+            list_rows.append('<tr><td>' + str(len(list_rows)) + '</td><td><img src="x.png" width="40"></td><td>' + prefix
+                             + '<a href="/wiki/' + title + anchor + '">' + name + '</a></td><td></td><td></td><td>' + poke
+                             + '</td><td>' + ptype + '</td><td>' + weak + '</td><td>' + role + '</td><td></td><td>'
+                             + rng.choice(('★★★', '★★★★', '★★★★★', '★★★★★ EX')) + '</td></tr>')
+        body.append('<h2><span class="mw-headline">Trivia</span></h2><p>Trivia.</p>')
+        html = ('<!DOCTYPE html><html><head><title>' + name + ' (Masters)</title><script>RLCONF={"wgRevisionId":'
+                + str(1000 + ti) + '};</script></head><body><div id="mw-navigation"><ul>'
+                + '<li><a href="/x">nav</a></li>' * 200 + '</ul></div><div id="content"><div id="mw-content-text">'
+                '<div class="mw-parser-output">' + ''.join(body) + '</div></div></div><div class="printfooter">Retrieved</div>'
+                '<div id="catlinks">cats</div><div id="footer">' + '<p>footer</p>' * 100 + '</div></body></html>')
+        with open(page_file(root, title), 'w', encoding='utf-8') as f:
+            f.write(html)
+    lst = ('<!DOCTYPE html><html><head><title>List</title></head><body><div id="mw-navigation">'
+           + '<a href="/n">n</a>' * 300 + '</div><div id="mw-content-text"><div class="mw-parser-output">'
+           '<table class="roundy sortable"><tr><th>#</th><th></th><th>Trainer</th><th></th><th></th><th>Pokémon</th>'
+           '<th>Type</th><th>Weakness</th><th>Role</th><th></th><th>Rarity</th></tr>' + ''.join(list_rows)
+           + '</table></div></div></body></html>')
+    with open(os.path.join(root, LIST_FILE), 'w', encoding='utf-8') as f:
+        f.write(lst)
+    print("Generated " + str(trainers) + " pages, " + str(len(list_rows)) + " listed pairs -> " + root)
+
+def corpus_from_cache(cache_dir, root):
+    # Copies the list page and every cached trainer page of a real run.
+    os.makedirs(os.path.join(root, 'pages'), exist_ok=True)
+    cache = scraper.HttpCache(cache_dir)
+    pages = 0
+    for fn in sorted(os.listdir(cache_dir)):
+        if not fn.endswith('.json'):
+            continue
+        with open(os.path.join(cache_dir, fn), 'r', encoding='utf-8') as f:
+            url = json.load(f).get('url', '')
+        path = urlparse(url).path
+        if not path.startswith('/wiki/'):
+            continue
+        meta, body = cache.load(url)
+        if meta is None:
+            continue
+        title = unquote(path[len('/wiki/'):])
+        if title == 'List_of_sync_pairs':
+            target = os.path.join(root, LIST_FILE)
+        elif title.endswith('(Masters)'):
+            target = page_file(root, title)
+            pages += 1
+        else:
+            continue
+        with open(target, 'w', encoding='utf-8') as f:
+            f.write(body.decode(meta.get('encoding') or 'utf-8', errors='replace'))
+    print("Copied " + str(pages) + " cached pages -> " + root)
+
+def load_corpus(root):
+    with open(os.path.join(root, LIST_FILE), 'r', encoding='utf-8') as f:
+        list_html = f.read()
+    pages = {}
+    for fn in sorted(os.listdir(os.path.join(root, 'pages'))):
+        if fn.endswith('.html'):
+            with open(os.path.join(root, 'pages', fn), 'r', encoding='utf-8') as f:
+                pages[unquote(fn[:-5])] = f.read()
+    return list_html, pages
+
+# ---------------------------------------------------------------- runs
+def run_pipeline(list_html, pages):
+    # list -> parse every page -> match listed pairs; returns stage seconds.
+    out = {}
+    start = time.perf_counter()
+    _, pairs = scraper.parse_sync_pair_list(list_html)
+    out['list'] = time.perf_counter() - start
+    by_page = {}
+    for p in pairs:
+        by_page.setdefault(unquote(urlparse(p['page_url']).path).split('/wiki/', 1)[-1], []).append(p)
+    parsed = {}
+    t = time.perf_counter()
+    for title, html in pages.items():
+        parsed[title] = scraper.parse_trainer_page(html) or []
+    out['pages'] = time.perf_counter() - t
+    t = time.perf_counter()
+    matched = 0
+    for title, page_pairs in by_page.items():
+        matcher = scraper.SectionMatcher(parsed.get(title, []))
+        for p in page_pairs:
+            if matcher.match(p)[0]:
+                matched += 1
+    out['match'] = time.perf_counter() - t
+    out['total'] = time.perf_counter() - start
+    return out, len(pairs), matched
+
+class FunctionTimers:
+    # Wraps scraper module functions (or "Class.method" names) with
+    # inclusive call/second counters.
+    def __init__(self, names=TIMED_FUNCTIONS):
+        self.names = names
+        self.calls = {n: 0 for n in names}
+        self.seconds = {n: 0.0 for n in names}
+        self.originals = {}
+
+    def wrap(self, name, fn):
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.seconds[name] += time.perf_counter() - start
+                self.calls[name] += 1
+        return timed
+
+    def target(self, name):
+        owner = scraper
+        *path, attr = name.split('.')
+        for part in path:
+            owner = getattr(owner, part)
+        return owner, attr
+
+    def __enter__(self):
+        for name in self.names:
+            owner, attr = self.target(name)
+            self.originals[name] = getattr(owner, attr)
+            setattr(owner, attr, self.wrap(name, self.originals[name]))
+        return self
+
+    def __exit__(self, *exc):
+        for name, fn in self.originals.items():
+            owner, attr = self.target(name)
+            setattr(owner, attr, fn)
+
+def peak_rss_kb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == 'darwin' else rss
+
+def benchmark(root, repeat=5):
+    list_html, pages = load_corpus(root)
+    sink = io.StringIO()
+    with redirect_stdout(sink):
+        run_pipeline(list_html, pages)
+        stages = []
+        for _ in range(repeat):
+            stages.append(run_pipeline(list_html, pages)[0])
+            sink.seek(0)
+            sink.truncate()
+        per_function = []
+        for _ in range(repeat):
+            with FunctionTimers() as timers:
+                run_pipeline(list_html, pages)
+            per_function.append(timers)
+            sink.seek(0)
+            sink.truncate()
+        tracemalloc.start()
+        _, pairs, matched = run_pipeline(list_html, pages)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    timings = {}
+    for stage in stages[0]:
+        values = [s[stage] for s in stages]
+        timings[stage] = {'median': statistics.median(values), 'min': min(values)}
+    functions = {}
+    for name in TIMED_FUNCTIONS:
+        values = [t.seconds[name] for t in per_function]
+        functions[name] = {'calls': per_function[0].calls[name], 'median': statistics.median(values),
+                           'min': min(values)}
+    total = timings['total']['median']
+    return {
+        'version': 1,
+        'corpus': {'path': root, 'pages': len(pages), 'pairs': pairs, 'matched': matched,
+                   'bytes': len(list_html.encode('utf-8')) + sum(len(h.encode('utf-8')) for h in pages.values())},
+        'config': {'parser': scraper.HTML_PARSER, 'partial': scraper.PARTIAL_PARSE, 'repeat': repeat,
+                   'python': platform.python_version(), 'machine': platform.machine()},
+        'timings': timings,
+        'functions': functions,
+        'throughput': {'pages_per_sec': len(pages) / total if total else None},
+        'memory': {'tracemalloc_peak_bytes': peak, 'max_rss_kb': peak_rss_kb()},
+    }
+
+def compare(result, baseline, threshold=DEFAULT_THRESHOLD):
+    # -> list of regressions, each {'metric', 'baseline', 'current', 'ratio'}.
+    pairs = [('timings.' + k, v['median'], result['timings'].get(k, {}).get('median'))
+             for k, v in baseline.get('timings', {}).items()]
+    pairs += [('functions.' + k, v['median'], result['functions'].get(k, {}).get('median'))
+              for k, v in baseline.get('functions', {}).items()]
+    regressions = []
+    for metric, old, new in pairs:
+        if new is None or old < MIN_COMPARE_SECONDS:
+            continue
+        ratio = new / old
+        if ratio > 1 + threshold:
+            regressions.append({'metric': metric, 'baseline': old, 'current': new, 'ratio': round(ratio, 3)})
+    return regressions
+
+def print_report(result):
+    c = result['corpus']
+    print("Corpus: " + str(c['pages']) + " pages, " + str(c['pairs']) + " pairs (" + str(c['matched'])
+          + " matched), " + str(c['bytes'] // 1024) + " KB")
+    for stage, t in result['timings'].items():
+        print("  %-24s %9.1f ms  (min %.1f)" % (stage, t['median'] * 1000, t['min'] * 1000))
+    for name, t in sorted(result['functions'].items(), key=lambda kv: -kv[1]['median']):
+        print("  %-24s %9.1f ms  %7d calls" % (name, t['median'] * 1000, t['calls']))
+    print("  %.1f pages/sec, peak traced %.1f MB" % (
+        result['throughput']['pages_per_sec'] or 0, result['memory']['tracemalloc_peak_bytes'] / 1e6))
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Offline parsing benchmark")
+    ap.add_argument('corpus', help="corpus directory")
+    ap.add_argument('--generate', action='store_true',
+                    help="write a synthetic corpus into the directory, then exit")
+    ap.add_argument('--trainers', type=int, default=120,
+                    help="pages to generate (default: %(default)s)")
+    ap.add_argument('--from-cache', metavar='CACHE_DIR',
+                    help="copy the list and trainer pages from an HTTP cache into the directory, then exit")
+    ap.add_argument('--repeat', type=int, default=5,
+                    help="timed runs per measurement (default: %(default)s)")
+    ap.add_argument('--parser', choices=scraper.HTML_PARSERS, default=scraper.HTML_PARSER,
+                    help="BeautifulSoup backend (default: %(default)s)")
+    ap.add_argument('--full-parse', action='store_true',
+                    help="parse whole pages instead of only the content region")
+    ap.add_argument('--out', default=RESULTS_FILE,
+                    help="JSON results file, '-' for stdout (default: %(default)s)")
+    ap.add_argument('--baseline', help="compare against this results file")
+    ap.add_argument('--save-baseline', metavar='PATH', help="also write the results here as the new baseline")
+    ap.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                    help="allowed slowdown before a timing counts as a regression (default: %(default)s)")
+    args = ap.parse_args(argv)
+    if args.generate:
+        generate_corpus(args.corpus, args.trainers)
+        return
+    if args.from_cache:
+        corpus_from_cache(args.from_cache, args.corpus)
+        return
+    scraper.set_html_parser(args.parser)
+    scraper.set_partial_parse(not args.full_parse)
+    result = benchmark(args.corpus, max(1, args.repeat))
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            result['regressions'] = compare(result, json.load(f), args.threshold)
+        result['threshold'] = args.threshold
+    text = json.dumps(result, indent=2)
+    if args.out == '-':
+        print(text)
+    else:
+        print_report(result)
+        with open(args.out, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+        for r in result.get('regressions', []):
+            print("REGRESSION: %s %.1f ms -> %.1f ms (x%.2f)" % (r['metric'], r['baseline'] * 1000,
+                                                               r['current'] * 1000, r['ratio']))
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    if result.get('regressions'):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+import os
+import re
+import json
+import hashlib
+import unicodedata
+from datetime import datetime, timezone
+
+# ================================================================
+# Shared by the scraper and the read API (masters_dex.py): the pair
+# naming rules behind entry IDs, and the on-disk DexStore.
+# ================================================================
+OUTPUT_FILE = "masters_dex_all.json"
+STORE_DIR = "masters_dex_store"
+STORE_COMPACT_RATIO = 2.0
+
+def normalize_pokemon(name):
+    name = name.split('\u2192')[-1].strip()
+    return re.sub(r'[\u2642\u2640]', '', name).strip()
+
+def slugify(text):
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    slug = re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-')
+    return slug or hashlib.sha1(text.encode('utf-8')).hexdigest()[:10]
+
+def pair_id(trainer, pokemon):
+    # Stable entry ID: slugged trainer (including any costume prefix) and
+    # slugged normalized pokemon, e.g. "special-costume-rosa--serperior".
+    return slugify(trainer) + "--" + slugify(normalize_pokemon(pokemon))
+
+def public_fields(entry):
+    # Scraped fields only, without the "_" run bookkeeping.
+    return {k: v for k, v in entry.items() if not k.startswith('_')}
+
+def fsync_dir(path):
+    if hasattr(os, 'O_DIRECTORY'):
+        fd = os.open(path or '.', os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+def write_atomic(path, data):
+    tmp = path + ".tmp"
+    with open(tmp, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    fsync_dir(os.path.dirname(path))
+
+class DexStore:
+    # Append-only JSON Lines log (one compact entry per line) plus
+    # manifest.json naming the log file and listing the live record of each
+    # DB position as [id, offset, length, sha256]. A commit appends only
+    # changed records, fsyncs the log, then atomically replaces the
+    # manifest, so a crash at any point leaves the previous snapshot
+    # readable.
+    def __init__(self, root=STORE_DIR):
+        self.root = root
+        self.manifest_path = os.path.join(root, 'manifest.json')
+        self.manifest = None
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                self.manifest = json.load(f)
+        self.log_path = os.path.join(root, self.manifest.get('log', 'records.jsonl') if self.manifest else 'records.jsonl')
+
+    def exists(self):
+        return self.manifest is not None
+
+    def __len__(self):
+        return len(self.manifest['records']) if self.manifest else 0
+
+    def records(self):
+        return self.manifest['records'] if self.manifest else []
+
+    def iter_entries(self, verify=True, records=None):
+        if not self.manifest:
+            return
+        if records is None:
+            records = self.manifest['records']
+        with open(self.log_path, 'rb') as f:
+            for eid, offset, length, sha in records:
+                f.seek(offset)
+                line = f.read(length)
+                if verify and hashlib.sha256(line).hexdigest() != sha:
+                    raise ValueError("store checksum mismatch for " + eid + " at offset " + str(offset))
+                yield json.loads(line)
+
+    def _verify_range(self, records, start):
+        with open(self.log_path, 'rb') as f:
+            for eid, offset, length, sha in records:
+                if offset < start:
+                    continue
+                f.seek(offset)
+                if hashlib.sha256(f.read(length)).hexdigest() != sha:
+                    raise ValueError("verify failed for " + eid)
+
+    def commit(self, db, dirty):
+        # db is the full entry list in order; positions not in dirty are
+        # unchanged since load and reuse their existing record.
+        os.makedirs(self.root, exist_ok=True)
+        old = self.manifest['records'] if self.manifest else []
+        size = self.manifest['log_bytes'] if self.manifest else 0
+        if os.path.exists(self.log_path) and os.path.getsize(self.log_path) > size:
+            os.truncate(self.log_path, size)
+        elif not os.path.exists(self.log_path):
+            size = 0
+        start = size
+        records = []
+        appended = 0
+        with open(self.log_path, 'ab') as f:
+            for i, entry in enumerate(db):
+                if i < len(old) and i not in dirty:
+                    records.append(old[i])
+                    continue
+                line = json.dumps(entry, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n'
+                sha = hashlib.sha256(line).hexdigest()
+                if i < len(old) and old[i][3] == sha:
+                    records.append(old[i])
+                    continue
+                f.write(line)
+                records.append([entry['id'], size, len(line), sha])
+                size += len(line)
+                appended += 1
+            f.flush()
+            os.fsync(f.fileno())
+        self._verify_range(records, start)
+        if self.manifest and records == old:
+            # Nothing changed: leave the manifest (and its timestamp) alone.
+            return 0
+        manifest = {'version': 1, 'log': os.path.basename(self.log_path),
+                    'generation': self.manifest.get('generation', 0) if self.manifest else 0,
+                    'count': len(records), 'log_bytes': size,
+                    'live_bytes': sum(r[2] for r in records), 'updated': datetime.now(timezone.utc).isoformat(),
+                    'records': records}
+        write_atomic(self.manifest_path, json.dumps(manifest).encode('utf-8'))
+        self.manifest = manifest
+        if size > STORE_COMPACT_RATIO * max(1, manifest['live_bytes']):
+            self.compact()
+        return appended
+
+    def compact(self):
+        # Rewrites the live records, in DB order, into a new log generation
+        # (records.<n>.jsonl). The new log is complete and fsynced before the
+        # manifest is swapped to name it, and the old log is only deleted
+        # after that, so the manifest on disk always points into a log that
+        # matches it.
+        gen = self.manifest.get('generation', 0) + 1
+        name = 'records.' + str(gen) + '.jsonl'
+        path = os.path.join(self.root, name)
+        tmp = path + ".tmp"
+        records = []
+        size = 0
+        with open(self.log_path, 'rb') as src, open(tmp, 'wb') as dst:
+            for eid, offset, length, sha in self.manifest['records']:
+                src.seek(offset)
+                dst.write(src.read(length))
+                records.append([eid, size, length, sha])
+                size += length
+            dst.flush()
+            os.fsync(dst.fileno())
+        os.replace(tmp, path)
+        fsync_dir(self.root)
+        manifest = dict(self.manifest, log=name, generation=gen, records=records, log_bytes=size, live_bytes=size)
+        write_atomic(self.manifest_path, json.dumps(manifest).encode('utf-8'))
+        self.manifest = manifest
+        self.log_path = path
+        # Old generations, and any left by a compaction that crashed before
+        # its manifest swap, are no longer referenced.
+        for f in os.listdir(self.root):
+            if f != name and re.match(r'records(\.\d+)?\.jsonl$', f):
+                os.remove(os.path.join(self.root, f))
+        fsync_dir(self.root)
@@ -0,0 +1,511 @@
+import os
+import re
+import sys
+import gzip
+import json
+import struct
+import hashlib
+import sqlite3
+from array import array
+
+from dexcore import public_fields
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# ================================================================
+# Derived outputs built from the DexStore (see scraper.py). Each export
+# compares the per-record sha256 in the store manifest with what it
+# wrote last time and only touches pairs whose record changed.
+# ================================================================
+SQLITE_FILE = "masters_dex.sqlite"
+COLUMNS_DIR = "masters_dex_columns"
+COLUMNS_VERSION = 1
+SQLITE_SCHEMA_VERSION = 1
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS pairs (
+    id TEXT PRIMARY KEY, trainer TEXT, trainer_variant TEXT, trainer_sprite TEXT,
+    pokemon TEXT, type TEXT, weakness TEXT, role TEXT, ex_role TEXT, move_type TEXT,
+    rarity TEXT, stars INTEGER, ex INTEGER, url TEXT, status TEXT, revid INTEGER,
+    record_sha TEXT
+);
+CREATE INDEX IF NOT EXISTS pairs_type ON pairs(type);
+CREATE INDEX IF NOT EXISTS pairs_role ON pairs(role);
+CREATE INDEX IF NOT EXISTS pairs_rarity ON pairs(rarity);
+CREATE INDEX IF NOT EXISTS pairs_trainer ON pairs(trainer);
+CREATE INDEX IF NOT EXISTS pairs_weakness ON pairs(weakness);
+CREATE TABLE IF NOT EXISTS stats (
+    pair_id TEXT PRIMARY KEY REFERENCES pairs(id),
+    hp INTEGER, attack INTEGER, defense INTEGER, sp_atk INTEGER, sp_def INTEGER, speed INTEGER
+);
+CREATE TABLE IF NOT EXISTS pokemon_images (
+    pair_id TEXT REFERENCES pairs(id), idx INTEGER, url TEXT, PRIMARY KEY (pair_id, idx)
+);
+CREATE TABLE IF NOT EXISTS moves (
+    pair_id TEXT REFERENCES pairs(id), idx INTEGER, move_type TEXT, name TEXT, type TEXT,
+    category TEXT, gauge INTEGER, base_power INTEGER, max_power INTEGER, accuracy INTEGER,
+    target TEXT, description TEXT, PRIMARY KEY (pair_id, idx)
+);
+CREATE INDEX IF NOT EXISTS moves_name ON moves(name);
+CREATE TABLE IF NOT EXISTS skills (
+    pair_id TEXT REFERENCES pairs(id), kind TEXT, idx INTEGER, name TEXT, description TEXT,
+    PRIMARY KEY (pair_id, kind, idx)
+);
+CREATE TABLE IF NOT EXISTS sync_grid (
+    pair_id TEXT REFERENCES pairs(id), idx INTEGER, name TEXT, effect TEXT,
+    energy_required INTEGER, sync_orb_required INTEGER, move_level_required INTEGER,
+    PRIMARY KEY (pair_id, idx)
+);
+CREATE TABLE IF NOT EXISTS texts (
+    rowid INTEGER PRIMARY KEY, pair_id TEXT, kind TEXT, name TEXT, description TEXT
+);
+CREATE INDEX IF NOT EXISTS texts_pair ON texts(pair_id);
+"""
+
+# External-content FTS5 index over texts (move, passive, theme and grid
+# tile names/descriptions), kept in sync by triggers.
+SQLITE_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS texts_fts USING fts5(
+    name, description, content='texts', content_rowid='rowid'
+);
+CREATE TRIGGER IF NOT EXISTS texts_ai AFTER INSERT ON texts BEGIN
+    INSERT INTO texts_fts(rowid, name, description) VALUES (new.rowid, new.name, new.description);
+END;
+CREATE TRIGGER IF NOT EXISTS texts_ad AFTER DELETE ON texts BEGIN
+    INSERT INTO texts_fts(texts_fts, rowid, name, description)
+    VALUES ('delete', old.rowid, old.name, old.description);
+END;
+"""
+
+CHILD_TABLES = ('stats', 'pokemon_images', 'moves', 'skills', 'sync_grid', 'texts')
+STAT_COLUMNS = (('HP', 'hp'), ('Attack', 'attack'), ('Defense', 'defense'),
+                ('Sp.Atk', 'sp_atk'), ('Sp.Def', 'sp_def'), ('Speed', 'speed'))
+
+def to_int(value):
+    if value is None:
+        return None
+    m = re.match(r'^\s*(-?\d[\d,]*)', str(value))
+    return int(m.group(1).replace(',', '')) if m else None
+
+def live_records(store):
+    # First record per id, in DB order (legacy files may repeat an id).
+    seen = {}
+    for rec in store.records():
+        if rec[0] not in seen:
+            seen[rec[0]] = rec
+    return seen
+
+def sqlite_schema_version(conn):
+    # None for an empty database, '' for tables without a recorded version.
+    tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    if not tables:
+        return None
+    if 'meta' not in tables:
+        return ''
+    row = conn.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()
+    return row[0] if row else ''
+
+def open_sqlite(path):
+    # A database written under another schema version is rebuilt from
+    # scratch rather than updated in place.
+    conn = sqlite3.connect(path)
+    version = sqlite_schema_version(conn)
+    if version is not None and version != str(SQLITE_SCHEMA_VERSION):
+        print("   [SQLITE] schema version " + (version or "unknown") + " != " + str(SQLITE_SCHEMA_VERSION)
+              + ", rebuilding")
+        conn.close()
+        os.remove(path)
+        conn = sqlite3.connect(path)
+    conn.executescript(SQLITE_SCHEMA)
+    try:
+        conn.executescript(SQLITE_FTS_SCHEMA)
+    except sqlite3.OperationalError as e:
+        print("   [SQLITE] full-text search unavailable: " + str(e))
+    with conn:
+        conn.execute("INSERT OR REPLACE INTO meta VALUES ('schema_version', ?)", (str(SQLITE_SCHEMA_VERSION),))
+    return conn
+
+def insert_pair(conn, entry, sha):
+    pid = entry['id']
+    info = entry.get('info') or {}
+    rarity = entry.get('rarity', '')
+    conn.execute("INSERT INTO pairs VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)", (
+        pid, entry.get('trainer', ''), entry.get('trainer_variant', ''), entry.get('trainer_sprite', ''),
+        entry.get('pokemon', ''), entry.get('type', ''), entry.get('weakness', ''), entry.get('role', ''),
+        info.get('ex_role', ''), info.get('move_type', ''), rarity, rarity.count('★'),
+        1 if 'EX' in rarity else 0, entry.get('url', ''), entry.get('_status', ''),
+        entry.get('_revid'), sha))
+    stats = entry.get('stats') or {}
+    if stats:
+        conn.execute("INSERT INTO stats VALUES (?,?,?,?,?,?,?)",
+                     [pid] + [to_int(stats.get(k)) for k, _ in STAT_COLUMNS])
+    for i, url in enumerate(entry.get('pokemon_images') or []):
+        conn.execute("INSERT INTO pokemon_images VALUES (?,?,?)", (pid, i, url))
+    texts = []
+    for i, m in enumerate(entry.get('moves') or []):
+        conn.execute("INSERT INTO moves VALUES (?,?,?,?,?,?,?,?,?,?,?,?)", (
+            pid, i, m.get('move_type', ''), m.get('name', ''), m.get('type', ''), m.get('category', ''),
+            to_int(m.get('gauge')), to_int(m.get('base_power')), to_int(m.get('max_power')),
+            to_int(m.get('accuracy')), m.get('target', ''), m.get('description', '')))
+        texts.append(('move', m.get('name', ''), m.get('description', '')))
+    for kind in ('passive', 'theme'):
+        for i, sk in enumerate(entry.get(kind + '_skills') or []):
+            conn.execute("INSERT INTO skills VALUES (?,?,?,?,?)",
+                         (pid, kind, i, sk.get('name', ''), sk.get('description', '')))
+            texts.append((kind, sk.get('name', ''), sk.get('description', '')))
+    for i, g in enumerate(entry.get('sync_grid') or []):
+        conn.execute("INSERT INTO sync_grid VALUES (?,?,?,?,?,?,?)", (
+            pid, i, g.get('name', ''), g.get('effect', ''), to_int(g.get('energy_required')),
+            to_int(g.get('sync_orb_required')), to_int(g.get('move_level_required'))))
+        texts.append(('grid', g.get('name', ''), g.get('effect', '')))
+    conn.executemany("INSERT INTO texts (pair_id, kind, name, description) VALUES (?,?,?,?)",
+                     [(pid,) + t for t in texts])
+
+def delete_pair(conn, pid):
+    for table in CHILD_TABLES:
+        conn.execute("DELETE FROM " + table + " WHERE pair_id = ?", (pid,))
+    conn.execute("DELETE FROM pairs WHERE id = ?", (pid,))
+
+def export_sqlite(store, path=SQLITE_FILE):
+    # Brings the SQLite file in line with the store: pairs whose record sha
+    # changed are deleted and re-inserted, vanished ids are removed. Returns
+    # (written, removed).
+    live = live_records(store)
+    conn = open_sqlite(path)
+    try:
+        current = dict(conn.execute("SELECT id, record_sha FROM pairs"))
+        stale = [rec for pid, rec in live.items() if current.get(pid) != rec[3]]
+        removed = [pid for pid in current if pid not in live]
+        if not stale and not removed:
+            return 0, 0
+        with conn:
+            for pid in removed:
+                delete_pair(conn, pid)
+            for entry, rec in zip(store.iter_entries(records=stale), stale):
+                if entry['id'] in current:
+                    delete_pair(conn, entry['id'])
+                insert_pair(conn, entry, rec[3])
+        return len(stale), len(removed)
+    finally:
+        conn.close()
+
+
+# ================================================================
+# Columnar export: one .npy file per numeric column (written with the
+# stdlib, loadable with numpy.load(..., mmap_mode='r')) plus
+# columns.json holding ids, category tables and the column list.
+# Missing numbers are stored as -1; category code 0 means empty.
+# ================================================================
+NPY_TYPECODES = {'<i2': 'h', '<i4': 'i', '<u1': 'B'}
+CATEGORY_FIELDS = ('type', 'weakness', 'role', 'rarity')
+MOVE_KINDS = ('Move', 'Sync Move', 'Max Move')
+MOVE_NUMBERS = ('gauge', 'base_power', 'max_power', 'accuracy')
+
+def write_npy(path, descr, shape, values):
+    data = array(NPY_TYPECODES[descr], values)
+    if sys.byteorder != 'little':
+        data.byteswap()
+    header = "{'descr': '%s', 'fortran_order': False, 'shape': %r, }" % (descr, tuple(shape))
+    pad = 64 - (10 + len(header) + 1) % 64
+    header = (header + ' ' * pad + '\n').encode('latin1')
+    tmp = path + ".tmp"
+    with open(tmp, 'wb') as f:
+        f.write(b'\x93NUMPY\x01\x00' + struct.pack('<H', len(header)) + header)
+        data.tofile(f)
+    os.replace(tmp, path)
+
+INT_RANGES = (('<i2', -2 ** 15, 2 ** 15 - 1), ('<i4', -2 ** 31, 2 ** 31 - 1))
+
+def int_descr(name, values):
+    # Narrowest signed type holding every value of the column.
+    lo, hi = min(values, default=0), max(values, default=0)
+    for descr, low, high in INT_RANGES:
+        if low <= lo and hi <= high:
+            return descr
+    raise ValueError("column " + name + " has values outside int32: " + str(lo) + ".." + str(hi))
+
+def num_or_missing(value):
+    n = to_int(value)
+    return -1 if n is None else n
+
+def export_columns(store, root=COLUMNS_DIR):
+    # Full rebuild (numbers only, cheap) whenever the store's record hashes
+    # differ from the ones the current columns were built from. Returns the
+    # number of pairs written, or 0 when already current.
+    live = live_records(store)
+    source = hashlib.sha256(''.join(rec[3] for rec in live.values()).encode('ascii')).hexdigest()
+    manifest_path = os.path.join(root, 'columns.json')
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            if json.load(f).get('source') == source:
+                return 0
+    os.makedirs(root, exist_ok=True)
+    ids = []
+    stats = []
+    stars = []
+    ex = []
+    categories = {f: [''] for f in CATEGORY_FIELDS}
+    codes = {f: {'': 0} for f in CATEGORY_FIELDS}
+    cat_values = {f: [] for f in CATEGORY_FIELDS}
+    move_offsets = [0]
+    move_kind = []
+    move_numbers = {k: [] for k in MOVE_NUMBERS}
+    for entry in store.iter_entries(records=list(live.values())):
+        ids.append(entry['id'])
+        st = entry.get('stats') or {}
+        stats.extend(num_or_missing(st.get(name)) for name, _ in STAT_COLUMNS)
+        rarity = entry.get('rarity', '')
+        stars.append(rarity.count('★'))
+        ex.append(1 if 'EX' in rarity else 0)
+        for f in CATEGORY_FIELDS:
+            value = entry.get(f, '') or ''
+            if value not in codes[f]:
+                codes[f][value] = len(categories[f])
+                categories[f].append(value)
+            cat_values[f].append(codes[f][value])
+        for m in entry.get('moves') or []:
+            kind = m.get('move_type', 'Move')
+            move_kind.append(MOVE_KINDS.index(kind) if kind in MOVE_KINDS else 0)
+            for k in MOVE_NUMBERS:
+                move_numbers[k].append(num_or_missing(m.get(k)))
+        move_offsets.append(len(move_kind))
+    n = len(ids)
+    columns = {}
+
+    def column(name, descr, shape, values):
+        write_npy(os.path.join(root, name + '.npy'), descr, shape, values)
+        columns[name] = {'file': name + '.npy', 'dtype': descr, 'shape': list(shape)}
+
+    column('stats', int_descr('stats', stats), (n, len(STAT_COLUMNS)), stats)
+    column('stars', '<u1', (n,), stars)
+    column('ex', '<u1', (n,), ex)
+    for f in CATEGORY_FIELDS:
+        column(f, '<u1' if len(categories[f]) < 256 else '<i2', (n,), cat_values[f])
+    column('move_offsets', '<i4', (n + 1,), move_offsets)
+    column('move_kind', '<u1', (len(move_kind),), move_kind)
+    for k in MOVE_NUMBERS:
+        column('move_' + k, int_descr('move_' + k, move_numbers[k]), (len(move_kind),), move_numbers[k])
+    manifest = {'version': COLUMNS_VERSION, 'source': source, 'count': n, 'ids': ids,
+                'stat_names': [name for name, _ in STAT_COLUMNS], 'move_kinds': list(MOVE_KINDS),
+                'categories': categories, 'columns': columns}
+    tmp = manifest_path + ".tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(tmp, manifest_path)
+    return n
+
+
+# ================================================================
+# Delta feed: clients holding version v fetch manifest.json, then apply
+# deltas/<v+1>.json ... in order. Each delta lists added and changed
+# entries and removed ids. state.json keeps id -> [record sha, content
+# sha] of the published version; only records whose store sha moved are
+# read, and they count as changed when their content sha (the entry
+# without "_" bookkeeping fields) differs. Only the last FEED_KEEP deltas
+# are kept; clients older than manifest['oldest'] re-download the full DB.
+# ================================================================
+FEED_DIR = "masters_dex_feed"
+FEED_FORMAT = 1
+FEED_KEEP = 52
+
+def write_json(path, obj):
+    tmp = path + ".tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(obj, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp, path)
+
+def content_sha(entry):
+    return hashlib.sha256(json.dumps(public_fields(entry), ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()
+
+def state_hash(state):
+    h = hashlib.sha256()
+    for pid in sorted(state):
+        h.update((pid + ':' + state[pid][1] + '\n').encode('utf-8'))
+    return h.hexdigest()
+
+def publish_delta(root, manifest, version, state, keep):
+    # Adds deltas/<version>.json to the manifest and prunes old deltas.
+    name = 'deltas/' + str(version) + '.json'
+    with open(os.path.join(root, name), 'rb') as f:
+        data = f.read()
+    delta = json.loads(data)
+    deltas = manifest['deltas'] + [{
+        'version': version, 'from': delta['from'], 'file': name, 'sha256': hashlib.sha256(data).hexdigest(),
+        'added': len(delta['added']), 'changed': len(delta['changed']), 'removed': len(delta['removed']),
+    }]
+    for d in deltas[:-keep]:
+        path = os.path.join(root, d['file'])
+        if os.path.exists(path):
+            os.remove(path)
+    deltas = deltas[-keep:]
+    manifest = {'format': FEED_FORMAT, 'version': version, 'oldest': deltas[0]['from'],
+                'count': len(state), 'hash': state_hash(state), 'deltas': deltas}
+    write_json(os.path.join(root, 'manifest.json'), manifest)
+    return manifest
+
+def export_feed(store, root=FEED_DIR, keep=FEED_KEEP):
+    # Publishes a new version when any record sha differs from the last
+    # published state. Writes the delta, then state.json, then the manifest;
+    # a state one version ahead of the manifest means the last run stopped
+    # before the manifest, so that delta is published first. Returns
+    # (version, added, changed, removed), or None when nothing changed.
+    live = live_records(store)
+    manifest_path = os.path.join(root, 'manifest.json')
+    state_path = os.path.join(root, 'state.json')
+    manifest = {'format': FEED_FORMAT, 'version': 0, 'oldest': 0, 'deltas': []}
+    old = {'version': 0, 'records': {}}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    if os.path.exists(state_path):
+        with open(state_path, 'r', encoding='utf-8') as f:
+            old = json.load(f)
+    if old['version'] == manifest['version'] + 1:
+        manifest = publish_delta(root, manifest, old['version'], old['records'], keep)
+    elif old['version'] != manifest['version']:
+        raise ValueError("feed state version " + str(old['version']) + " does not match manifest "
+                         + str(manifest['version']))
+    old = old['records']
+    state = {}
+    moved = []
+    for pid, rec in live.items():
+        if pid in old and old[pid][0] == rec[3]:
+            state[pid] = old[pid]
+        else:
+            moved.append(rec)
+    added = []
+    changed = []
+    for entry, rec in zip(store.iter_entries(records=moved), moved):
+        sha = content_sha(entry)
+        state[rec[0]] = [rec[3], sha]
+        if rec[0] not in old:
+            added.append(public_fields(entry))
+        elif old[rec[0]][1] != sha:
+            changed.append(public_fields(entry))
+    removed = [pid for pid in old if pid not in state]
+    if not added and not changed and not removed:
+        if moved:
+            write_json(state_path, {'version': manifest['version'], 'records': state})
+        return None
+    os.makedirs(os.path.join(root, 'deltas'), exist_ok=True)
+    version = manifest['version'] + 1
+    write_json(os.path.join(root, 'deltas', str(version) + '.json'), {
+        'format': FEED_FORMAT, 'version': version, 'from': manifest['version'],
+        'added': added, 'changed': changed, 'removed': removed,
+    })
+    write_json(state_path, {'version': version, 'records': state})
+    publish_delta(root, manifest, version, state, keep)
+    return version, len(added), len(changed), len(removed)
+
+
+# ================================================================
+# Static API: small JSON shards for CDN consumers, each with .gz (and
+# .br when brotli is installed) siblings.
+#   pairs/<id>.json          one entry
+#   trainers/<slug>.json     every entry of one trainer
+#   index/pairs.json         id, trainer, pokemon, type, role, rarity
+#   index/{type,role,rarity,weakness}.json   value -> [ids]
+# manifest.json maps each shard path to its sha256 and size, for
+# cache-busting. Output is deterministic and unchanged shards are not
+# rewritten, so a commit only carries shards whose hash changed.
+# ================================================================
+API_DIR = "masters_dex_api"
+API_FORMAT = 1
+API_INDEX_FIELDS = ('type', 'role', 'rarity', 'weakness')
+
+def api_shards(entries):
+    shards = {}
+    trainers = {}
+    summary = []
+    indexes = {f: {} for f in API_INDEX_FIELDS}
+    for entry in entries:
+        pid = entry['id']
+        shards['pairs/' + pid + '.json'] = entry
+        trainers.setdefault(pid.split('--')[0], []).append(entry)
+        summary.append({k: entry.get(k, '') for k in ('id', 'trainer', 'pokemon', 'type', 'role', 'rarity')})
+        for f in API_INDEX_FIELDS:
+            value = entry.get(f) or ''
+            if value:
+                indexes[f].setdefault(value, []).append(pid)
+    for slug, group in trainers.items():
+        shards['trainers/' + slug + '.json'] = group
+    shards['index/pairs.json'] = summary
+    shards['index/trainers.json'] = {slug: [e['id'] for e in group] for slug, group in trainers.items()}
+    for f, idx in indexes.items():
+        shards['index/' + f + '.json'] = idx
+    return shards
+
+def write_bytes(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+def write_siblings(path, data, info, missing_only=False):
+    # Writes the .gz/.br copies of a shard and records their sizes in info;
+    # with missing_only, only the copies that are not on disk. Returns True
+    # if anything was written. A .br left from a run with brotli is removed
+    # when brotli is unavailable, rather than left stale.
+    wrote = False
+    if not (missing_only and os.path.exists(path + '.gz')):
+        gz = gzip.compress(data, 9, mtime=0)
+        write_bytes(path + '.gz', gz)
+        info['gz'] = len(gz)
+        wrote = True
+    if brotli is not None:
+        if not (missing_only and os.path.exists(path + '.br')):
+            br = brotli.compress(data)
+            write_bytes(path + '.br', br)
+            info['br'] = len(br)
+            wrote = True
+    elif not missing_only and os.path.exists(path + '.br'):
+        os.remove(path + '.br')
+    return wrote
+
+def export_api(store, root=API_DIR):
+    # Returns (written, removed) shard counts. Built from the live records
+    # (first per id, like the DB index) without the "_" bookkeeping fields.
+    manifest_path = os.path.join(root, 'manifest.json')
+    old = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            old = json.load(f).get('files', {})
+    files = {}
+    written = 0
+    repaired = 0
+    entries = (public_fields(e) for e in store.iter_entries(records=list(live_records(store).values())))
+    for rel, obj in sorted(api_shards(entries).items()):
+        data = json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        sha = hashlib.sha256(data).hexdigest()
+        files[rel] = {'sha256': sha, 'bytes': len(data)}
+        path = os.path.join(root, rel)
+        if old.get(rel, {}).get('sha256') == sha and os.path.exists(path):
+            files[rel] = dict(old[rel])
+            if write_siblings(path, data, files[rel], missing_only=True):
+                repaired += 1
+            continue
+        write_bytes(path, data)
+        write_siblings(path, data, files[rel])
+        written += 1
+    removed = 0
+    for rel in old:
+        if rel not in files:
+            for path in (rel, rel + '.gz', rel + '.br'):
+                if os.path.exists(os.path.join(root, path)):
+                    os.remove(os.path.join(root, path))
+            removed += 1
+    if written or removed or repaired or not os.path.exists(manifest_path):
+        h = hashlib.sha256()
+        for rel in sorted(files):
+            h.update((rel + ':' + files[rel]['sha256'] + '\n').encode('utf-8'))
+        os.makedirs(root, exist_ok=True)
+        with open(manifest_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump({'format': API_FORMAT, 'hash': h.hexdigest(), 'count': len(files), 'files': files},
+                      f, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(manifest_path + '.tmp', manifest_path)
+    return written, removed
@@ -0,0 +1,290 @@
+import ast
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+import time
+
+from dexcore import OUTPUT_FILE as JSON_FILE, STORE_DIR, DexStore, normalize_pokemon
+from exports import COLUMNS_DIR, NPY_TYPECODES, to_int
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# ================================================================
+# Read-side API over the scraped Dex: load once, then answer lookups
+# from lazily built secondary indexes instead of scanning the list.
+#
+#   dex = MastersDex.load()
+#   dex.filter(type='Water', role='Tech', rarity='★★★★★ EX')
+#   dex.filter(move='Hydro Pump', weakness=['Electric', 'Grass'])
+#   dex.stats('red--pikachu')  ->  {'HP': 552, 'Attack': 310, ...}
+# ================================================================
+STAT_NAMES = ("HP", "Attack", "Defense", "Sp.Atk", "Sp.Def", "Speed")
+INDEXED_FIELDS = ('trainer', 'pokemon', 'type', 'weakness', 'role', 'rarity', 'move')
+
+def index_key(value):
+    return re.sub(r'\s+', ' ', value).strip().casefold()
+
+def pokemon_key(name):
+    return index_key(normalize_pokemon(name))
+
+def read_store(root=STORE_DIR):
+    # Checksum-verified, like every other reader of the store.
+    return list(DexStore(root).iter_entries())
+
+class MastersDex:
+    def __init__(self, entries):
+        self.entries = list(entries)
+        self.by_id = {}
+        for i, entry in enumerate(self.entries):
+            eid = entry.get('id')
+            if eid and eid not in self.by_id:
+                self.by_id[eid] = i
+        self._indexes = {}
+        self._stats = None
+
+    @classmethod
+    def load(cls, path=None):
+        # path may be the store directory or a JSON export; by default the
+        # store is preferred when present.
+        if path is None:
+            path = STORE_DIR if os.path.exists(os.path.join(STORE_DIR, 'manifest.json')) else JSON_FILE
+        if os.path.isdir(path):
+            return cls(read_store(path))
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def get(self, eid):
+        i = self.by_id.get(eid)
+        return None if i is None else self.entries[i]
+
+    def _keys(self, field, entry):
+        if field == 'move':
+            return [index_key(m.get('name', '')) for m in entry.get('moves') or []]
+        if field == 'pokemon':
+            return [pokemon_key(entry.get('pokemon', ''))]
+        return [index_key(entry.get(field, '') or '')]
+
+    def index(self, field):
+        # value -> frozenset of entry positions, built on first use.
+        if field not in INDEXED_FIELDS:
+            raise KeyError("not an indexed field: " + field)
+        idx = self._indexes.get(field)
+        if idx is None:
+            idx = {}
+            for i, entry in enumerate(self.entries):
+                for key in self._keys(field, entry):
+                    if key:
+                        idx.setdefault(key, set()).add(i)
+            idx = {k: frozenset(v) for k, v in idx.items()}
+            self._indexes[field] = idx
+        return idx
+
+    def values(self, field):
+        return sorted(self.index(field))
+
+    def positions(self, **criteria):
+        # Each keyword is an indexed field; a list value matches any of its
+        # items. Fields are intersected smallest-first.
+        sets = []
+        for field, wanted in criteria.items():
+            if wanted is None:
+                continue
+            if isinstance(wanted, str):
+                wanted = [wanted]
+            keyf = pokemon_key if field == 'pokemon' else index_key
+            idx = self.index(field)
+            hits = set()
+            for w in wanted:
+                hits |= idx.get(keyf(w), frozenset())
+            if not hits:
+                return []
+            sets.append(hits)
+        if not sets:
+            return list(range(len(self.entries)))
+        sets.sort(key=len)
+        result = set(sets[0])
+        for other in sets[1:]:
+            result &= other
+            if not result:
+                return []
+        return sorted(result)
+
+    def filter(self, where=None, **criteria):
+        # Index intersection first; the optional where(entry) predicate only
+        # runs on the survivors.
+        found = [self.entries[i] for i in self.positions(**criteria)]
+        if where is not None:
+            found = [e for e in found if where(e)]
+        return found
+
+    def count(self, **criteria):
+        return len(self.positions(**criteria))
+
+    def stats(self, eid_or_entry):
+        entry = self.get(eid_or_entry) if isinstance(eid_or_entry, str) else eid_or_entry
+        if entry is None:
+            return None
+        raw = entry.get('stats') or {}
+        return {name: to_int(raw[name]) for name in STAT_NAMES if name in raw}
+
+    def stat_table(self):
+        # Per-position integer stats, converted once and cached.
+        if self._stats is None:
+            self._stats = [self.stats(e) for e in self.entries]
+        return self._stats
+
+    def top(self, stat, n=10, **criteria):
+        table = self.stat_table()
+        pos = [i for i in self.positions(**criteria) if table[i].get(stat) is not None]
+        pos.sort(key=lambda i: -table[i][stat])
+        return [(self.entries[i], table[i][stat]) for i in pos[:n]]
+
+
+# ================================================================
+# Columnar view: the .npy files written by exports.export_columns,
+# memory-mapped. With numpy they load as ndarrays; without it each
+# column is a typed memoryview (2-D columns are left flat, row-major).
+#
+#   cols = load_columns()
+#   top_n(cols, 'Attack', 10, role='Strike')
+#   role_percentiles(cols, 'Speed')
+# ================================================================
+def read_npy(path):
+    if np is not None:
+        return np.load(path, mmap_mode='r')
+    with open(path, 'rb') as f:
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    hlen = struct.unpack('<H', buf[8:10])[0]
+    header = ast.literal_eval(buf[10:10 + hlen].decode('latin1'))
+    data = memoryview(buf)[10 + hlen:]
+    return data.cast(NPY_TYPECODES[header['descr']]) if len(data) else []
+
+def load_columns(root=COLUMNS_DIR):
+    with open(os.path.join(root, 'columns.json'), 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    cols = {name: read_npy(os.path.join(root, c['file'])) for name, c in manifest['columns'].items()}
+    cols['manifest'] = manifest
+    return cols
+
+def stat_column(cols, stat):
+    names = cols['manifest']['stat_names']
+    j = names.index(stat)
+    if np is not None:
+        return cols['stats'][:, j]
+    return cols['stats'][j::len(names)]
+
+def column_mask(cols, **criteria):
+    # Category criteria (type/role/...) -> list of row positions, or None for all.
+    manifest = cols['manifest']
+    rows = None
+    for field, wanted in criteria.items():
+        if wanted is None:
+            continue
+        if isinstance(wanted, str):
+            wanted = [wanted]
+        table = [index_key(v) for v in manifest['categories'][field]]
+        codes = {i for i, v in enumerate(table) if v in {index_key(w) for w in wanted}}
+        if np is not None:
+            hit = np.flatnonzero(np.isin(cols[field], list(codes)))
+        else:
+            hit = [i for i, c in enumerate(cols[field]) if c in codes]
+        rows = hit if rows is None else (np.intersect1d(rows, hit) if np is not None else sorted(set(rows) & set(hit)))
+    return rows
+
+def top_n(cols, stat, n=10, **criteria):
+    # [(id, value)] highest first; missing stats (-1) are skipped.
+    ids = cols['manifest']['ids']
+    values = stat_column(cols, stat)
+    rows = column_mask(cols, **criteria)
+    if np is not None:
+        rows = np.arange(len(values)) if rows is None else rows
+        rows = rows[values[rows] >= 0]
+        rows = rows[np.argsort(-values[rows].astype('int32'), kind='stable')[:n]]
+        return [(ids[i], int(values[i])) for i in rows]
+    rows = range(len(values)) if rows is None else rows
+    rows = sorted((i for i in rows if values[i] >= 0), key=lambda i: -values[i])
+    return [(ids[i], values[i]) for i in rows[:n]]
+
+def role_percentiles(cols, stat, qs=(25, 50, 75, 90)):
+    # {role: {q: value}} using nearest-rank percentiles.
+    roles = cols['manifest']['categories']['role']
+    values = stat_column(cols, stat)
+    role = cols['role']
+    table = {}
+    for code, name in enumerate(roles):
+        if np is not None:
+            vals = np.sort(values[(role == code) & (values >= 0)])
+        else:
+            vals = sorted(v for v, r in zip(values, role) if r == code and v >= 0)
+        if len(vals):
+            table[name or '?'] = {q: int(vals[max(0, -(-q * len(vals) // 100) - 1)]) for q in qs}
+    return table
+
+
+# ================================================================
+# Micro-benchmarks: indexed queries against naive list scans
+# ================================================================
+def naive_filter(entries, **criteria):
+    out = []
+    for e in entries:
+        ok = True
+        for field, wanted in criteria.items():
+            if field == 'move':
+                if not any(index_key(m.get('name', '')) == index_key(wanted) for m in e.get('moves') or []):
+                    ok = False
+            elif field == 'pokemon':
+                if pokemon_key(e.get('pokemon', '')) != pokemon_key(wanted):
+                    ok = False
+            elif index_key(e.get(field, '') or '') != index_key(wanted):
+                ok = False
+            if not ok:
+                break
+        if ok:
+            out.append(e)
+    return out
+
+def timeit(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+def benchmark(dex, repeat=200):
+    entries = dex.entries
+    if not entries:
+        print("empty dex")
+        return []
+    sample = entries[len(entries) // 2]
+    move = (sample.get('moves') or [{}])[0].get('name', '')
+    queries = [
+        {'type': sample.get('type', '')},
+        {'type': sample.get('type', ''), 'role': sample.get('role', ''), 'rarity': sample.get('rarity', '')},
+        {'trainer': sample.get('trainer', '')},
+        {'move': move},
+    ]
+    build = timeit(lambda: [MastersDex(entries).index(f) for f in INDEXED_FIELDS], 5)
+    print("index build (all fields): %.2f ms for %d entries" % (build * 1000, len(entries)))
+    rows = []
+    for q in queries:
+        assert [e.get('id') for e in dex.filter(**q)] == [e.get('id') for e in naive_filter(entries, **q)]
+        t_idx = timeit(lambda: dex.filter(**q), repeat)
+        t_scan = timeit(lambda: naive_filter(entries, **q), repeat)
+        rows.append((q, t_idx, t_scan))
+        print("%-60s indexed %8.1f us  scan %8.1f us  x%.0f" % (
+            json.dumps(q, ensure_ascii=False)[:60], t_idx * 1e6, t_scan * 1e6, t_scan / max(t_idx, 1e-9)))
+    return rows
+
+if __name__ == "__main__":
+    benchmark(MastersDex.load(sys.argv[1] if len(sys.argv) > 1 else None))
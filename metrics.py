@@ -0,0 +1,131 @@
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+# ================================================================
+# Run metrics: counters, timers and value distributions, shared by
+# every thread of a run. Worker processes keep their own instance and
+# hand a snapshot() back to the parent, which merge()s it.
+#
+#   METRICS.incr('classify.moves')
+#   with METRICS.timer('parse.soup'): ...
+#   METRICS.observe('fetch.bytes', len(body))
+# ================================================================
+REPORT_FILE = "masters_dex_run.json"
+PROFILERS = ('cprofile', 'pyinstrument')
+
+class Metrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.counters = {}
+            self.timers = {}
+            self.values = {}
+
+    def incr(self, name, n=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def add_time(self, name, seconds):
+        with self.lock:
+            t = self.timers.setdefault(name, [0, 0.0, 0.0])
+            t[0] += 1
+            t[1] += seconds
+            t[2] = max(t[2], seconds)
+
+    def observe(self, name, value):
+        with self.lock:
+            self.values.setdefault(name, []).append(value)
+
+    @contextmanager
+    def timer(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def snapshot(self):
+        with self.lock:
+            return {'counters': dict(self.counters), 'timers': {k: list(v) for k, v in self.timers.items()},
+                    'values': {k: list(v) for k, v in self.values.items()}}
+
+    def merge(self, snap):
+        with self.lock:
+            for k, n in snap['counters'].items():
+                self.counters[k] = self.counters.get(k, 0) + n
+            for k, (count, total, peak) in snap['timers'].items():
+                t = self.timers.setdefault(k, [0, 0.0, 0.0])
+                t[0] += count
+                t[1] += total
+                t[2] = max(t[2], peak)
+            for k, vals in snap['values'].items():
+                self.values.setdefault(k, []).extend(vals)
+
+    def report(self):
+        snap = self.snapshot()
+        timers = {k: {'count': c, 'seconds': round(total, 4), 'max': round(peak, 4),
+                      'mean': round(total / c, 4) if c else 0}
+                  for k, (c, total, peak) in sorted(snap['timers'].items())}
+        return {'counters': dict(sorted(snap['counters'].items())), 'timers': timers,
+                'distributions': {k: summarize(v) for k, v in sorted(snap['values'].items())}}
+
+def summarize(values):
+    vals = sorted(values)
+    if not vals:
+        return {'count': 0}
+
+    def pct(q):
+        return vals[min(len(vals) - 1, int(q * len(vals)))]
+    return {'count': len(vals), 'min': vals[0], 'p50': pct(0.5), 'p90': pct(0.9), 'p99': pct(0.99),
+            'max': vals[-1], 'mean': round(sum(vals) / len(vals), 4), 'total': round(sum(vals), 4)}
+
+METRICS = Metrics()
+
+def write_report(path, extra=None):
+    report = dict(extra or {})
+    report['metrics'] = METRICS.report()
+    tmp = path + ".tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+    return report
+
+# ---------------------------------------------------------------- profiling
+def start_profiler(kind):
+    if kind == 'cprofile':
+        import cProfile
+        prof = cProfile.Profile()
+        prof.enable()
+        return prof
+    if kind == 'pyinstrument':
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            print("WARNING: pyinstrument not installed, profiling disabled")
+            return None
+        prof = Profiler()
+        prof.start()
+        return prof
+    return None
+
+def stop_profiler(prof, kind, path=None):
+    # cProfile writes pstats data (default .prof), pyinstrument an HTML report.
+    if prof is None:
+        return None
+    if kind == 'cprofile':
+        prof.disable()
+        path = path or "masters_dex_profile.prof"
+        prof.dump_stats(path)
+    else:
+        prof.stop()
+        path = path or "masters_dex_profile.html"
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(prof.output_html())
+    print("Profile written to " + path)
+    return path
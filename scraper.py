@@ -1,21 +1,82 @@
 import requests
-from bs4 import BeautifulSoup, Tag
+from bs4 import BeautifulSoup, SoupStrainer, Tag, FeatureNotFound
 import json
 import time
 import re
 import os
 import sys
 import shutil
-from datetime import datetime
+import hashlib
+import base64
+import gzip
+import random
+import threading
+import argparse
+import io
+from contextlib import contextmanager, redirect_stdout
+from collections import namedtuple, deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+from urllib.parse import urlparse, urlencode, unquote
+from email.utils import parsedate_to_datetime
+from html import unescape as unescape_html
+from datetime import datetime, timezone
+
+import assets
+import exports
+import metrics
+from dexcore import OUTPUT_FILE, STORE_DIR, DexStore, normalize_pokemon, slugify, pair_id, public_fields
+from metrics import METRICS
+
+try:
+    import lxml.html as lxml_html
+except ImportError:
+    lxml_html = None
 
 HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
 }
 BASE_URL = "https://bulbapedia.bulbagarden.net"
 LIST_URL = "https://bulbapedia.bulbagarden.net/wiki/List_of_sync_pairs"
-OUTPUT_FILE = "masters_dex_all.json"
-BACKUP_FILE = "masters_dex_backup.json"
-TEMP_FILE = "masters_dex_temp.json"
+API_URL = "https://bulbapedia.bulbagarden.net/w/api.php"
+API_BATCH = 50
+JOURNAL_FILE = "masters_dex_journal.jsonl"
+REPLAY_DIR = "masters_dex_replay"
+DEFAULT_WORKERS = 4
+HOST_DELAY = 0.5
+HOST_MAX_IN_FLIGHT = 2
+ADAPT_MIN_DELAY = 0.1
+ADAPT_MAX_DELAY = 30.0
+ADAPT_LATENCY_FACTOR = 3.0
+ADAPT_SLOW_FLOOR = 1.0
+BREAKER_WINDOW = 20
+BREAKER_MIN_SAMPLES = 8
+BREAKER_ERROR_RATE = 0.5
+BREAKER_COOLDOWN = 30.0
+BREAKER_MAX_TRIPS = 5
+PARSE_WORKERS = min(4, os.cpu_count() or 1)
+MAX_FAILED_RATIO = 0.5  # refuse to save when more of the run's pages failed
+HTTP_TIMEOUT = 30
+HTTP_RETRIES = 4
+HTTP_BACKOFF = 1.0
+HTTP_BACKOFF_MAX = 60.0
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+RETRY_EXCEPTIONS = (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError)
+SECTION_FIELDS = ('pokemon_images', 'stats', 'info', 'moves', 'passive_skills', 'theme_skills', 'sync_grid')
+HTML_PARSERS = ('lxml', 'html.parser', 'html5lib')
+HTML_PARSER = 'lxml' if lxml_html is not None else 'html.parser'
+PARTIAL_PARSE = True
+CONTENT_START = re.compile(r'<div[^>]*\bid="mw-content-text"')
+CONTENT_END_MARKERS = ('<div class="printfooter"', '<div id="catlinks"')
+RAW_H2 = re.compile(r'<h2[\s>].*?</h2>', re.S)
+RAW_HEADLINE = re.compile(r'<span\b[^>]*\bclass="[^"]*\bmw-headline\b[^"]*"[^>]*>')
+RAW_ID = re.compile(r'\bid="([^"]*)"')
+CACHE_DIR = ".http_cache"
+CACHE_MAX_AGE = 30 * 24 * 3600
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+SECTION_CACHE_DIR = ".section_cache"
+PARSER_VERSION = 1  # bump when parse_section_tables output changes
 
 def clean_text(text):
     if not text:
@@ -83,6 +144,55 @@ def extract_variant_from_infobox(infobox):
                 return english_part.strip()
     return ""
 
+def set_html_parser(name):
+    global HTML_PARSER
+    if name not in HTML_PARSERS:
+        raise ValueError("unknown parser: " + name)
+    HTML_PARSER = name
+
+def parser_available(name):
+    try:
+        BeautifulSoup("", name)
+        return True
+    except FeatureNotFound:
+        return False
+
+def set_partial_parse(enabled):
+    global PARTIAL_PARSE
+    PARTIAL_PARSE = enabled
+
+def make_soup(html, parser=None, parse_only=None):
+    parser = parser or HTML_PARSER
+    if parser == 'html5lib':
+        parse_only = None
+    try:
+        return BeautifulSoup(html, parser, parse_only=parse_only)
+    except FeatureNotFound:
+        return BeautifulSoup(html, 'html.parser', parse_only=parse_only)
+
+def slice_content(html):
+    # Cut the page down to the mw-content-text region: the <head>, skin
+    # navigation, footer and trailing scripts never reach the parser.
+    m = CONTENT_START.search(html)
+    if not m:
+        return html
+    end = len(html)
+    for marker in CONTENT_END_MARKERS:
+        i = html.find(marker, m.end())
+        if 0 <= i < end:
+            end = i
+    return html[m.start():end]
+
+def raw_headings(region):
+    # (offset, headline id) of every h2 holding a mw-headline span, in source order.
+    heads = []
+    for m in RAW_H2.finditer(region):
+        hl = RAW_HEADLINE.search(m.group())
+        if hl:
+            i = RAW_ID.search(hl.group())
+            heads.append((m.start(), unescape_html(i.group(1)) if i else None))
+    return heads
+
 def get_section_pokemon_names(section_name):
     name = section_name.lower().strip()
     name = re.sub(r'[\u2642\u2640]', '', name).strip()
@@ -96,41 +206,80 @@ def get_section_pokemon_names(section_name):
         names.add(simple)
     return names
 
-def get_sync_pair_list():
-    print("1. Loading sync pair list...")
-    res = requests.get(LIST_URL, headers=HEADERS, timeout=30)
-    soup = BeautifulSoup(res.text, 'html.parser')
+def list_rows_from_soup(html, parser=None, partial=None):
+    if partial is None:
+        partial = PARTIAL_PARSE
+    if partial:
+        html = slice_content(html)
+        soup = make_soup(html, parser, SoupStrainer('table', class_='sortable'))
+    else:
+        soup = make_soup(html, parser)
     tables = soup.find_all('table', class_='sortable')
     if not tables:
+        if partial:
+            soup = make_soup(html, parser, SoupStrainer('table'))
         tables = [t for t in soup.find_all('table') if len(t.find_all('tr')) > 10]
     if not tables:
+        return None
+    rows = []
+    for row in tables[0].find_all('tr')[1:]:
+        cols = row.find_all(['td', 'th'])
+        if len(cols) < 8:
+            rows.append(None)
+            continue
+        small_tag = cols[2].find('small')
+        prefix = clean_text(small_tag.get_text()) if small_tag else ""
+        links = [(a.get('href', ''), a.get_text()) for a in cols[2].find_all('a')]
+        rows.append(([c.get_text() for c in cols], prefix, links))
+    return rows
+
+def list_rows_from_lxml(html):
+    # Direct XPath walk of the list table; yields the same row tuples as
+    # list_rows_from_soup without building a BeautifulSoup tree.
+    doc = lxml_html.document_fromstring(html)
+    tables = doc.xpath("//table[contains(concat(' ', normalize-space(@class), ' '), ' sortable ')]")
+    if not tables:
+        tables = [t for t in doc.xpath('//table') if len(t.xpath('.//tr')) > 10]
+    if not tables:
+        return None
+    rows = []
+    for row in tables[0].xpath('.//tr')[1:]:
+        cols = row.xpath('.//td | .//th')
+        if len(cols) < 8:
+            rows.append(None)
+            continue
+        small_tags = cols[2].xpath('.//small')
+        prefix = clean_text(''.join(small_tags[0].itertext())) if small_tags else ""
+        links = [(a.get('href', ''), ''.join(a.itertext())) for a in cols[2].xpath('.//a')]
+        rows.append(([''.join(c.itertext()) for c in cols], prefix, links))
+    return rows
+
+def parse_sync_pair_list(html, xpath=False, parser=None, partial=None):
+    if xpath and lxml_html is not None:
+        rows = list_rows_from_lxml(html)
+    else:
+        rows = list_rows_from_soup(html, parser, partial)
+    if rows is None:
         return {}, []
-    main_table = tables[0]
-    rows = main_table.find_all('tr')[1:]
     print("   Found " + str(len(rows)) + " rows")
     trainer_pages = {}
     all_pairs = []
     seen = set()
     for row in rows:
-        cols = row.find_all(['td', 'th'])
-        if len(cols) < 8:
+        if row is None:
             continue
-        trainer_cell = cols[2]
-        small_tag = trainer_cell.find('small')
-        prefix = clean_text(small_tag.get_text()) if small_tag else ""
+        cols, prefix, links = row
         trainer_link = None
-        for a in trainer_cell.find_all('a'):
-            if '(Masters)' in a.get('href', ''):
-                trainer_link = a
+        for link in links:
+            if '(Masters)' in link[0]:
+                trainer_link = link
                 break
-        if not trainer_link:
-            all_links = trainer_cell.find_all('a')
-            if all_links:
-                trainer_link = all_links[-1]
+        if not trainer_link and links:
+            trainer_link = links[-1]
         if not trainer_link:
             continue
-        href = trainer_link.get('href', '')
-        base_name = clean_text(trainer_link.get_text())
+        href = trainer_link[0]
+        base_name = clean_text(trainer_link[1])
         trainer_full = (prefix + " " + base_name).strip() if prefix else base_name
         if '#' in href:
             page_path = href.split('#')[0]
@@ -142,19 +291,18 @@ def get_sync_pair_list():
             page_url = BASE_URL + page_path
         else:
             page_url = BASE_URL + "/wiki/" + base_name.replace(' ', '_') + "_(Masters)"
-        pokemon_full = clean_text(cols[5].get_text())
-        pokemon_clean = pokemon_full.split('\u2192')[-1].strip()
-        pokemon_clean = re.sub(r'[\u2642\u2640]', '', pokemon_clean).strip()
-        type_text = clean_text(cols[6].get_text())
-        weakness_text = clean_text(cols[7].get_text()) if len(cols) > 7 else ""
-        role_text = clean_text(cols[8].get_text()) if len(cols) > 8 else ""
-        rarity_raw = cols[10].get_text() if len(cols) > 10 else ""
+        pokemon_full = clean_text(cols[5])
+        pokemon_clean = normalize_pokemon(pokemon_full)
+        type_text = clean_text(cols[6])
+        weakness_text = clean_text(cols[7]) if len(cols) > 7 else ""
+        role_text = clean_text(cols[8]) if len(cols) > 8 else ""
+        rarity_raw = cols[10] if len(cols) > 10 else ""
         rarity_text = clean_rarity(rarity_raw)
         if 'Scottie' in trainer_full or 'Bettie' in trainer_full:
             continue
         if page_url not in trainer_pages:
             trainer_pages[page_url] = base_name
-        pair_key = trainer_full + "|" + pokemon_clean
+        pair_key = pair_id(trainer_full, pokemon_clean)
         if pair_key in seen:
             continue
         seen.add(pair_key)
@@ -167,11 +315,43 @@ def get_sync_pair_list():
     print("   " + str(len(trainer_pages)) + " trainer pages, " + str(len(all_pairs)) + " pairs")
     return trainer_pages, all_pairs
 
+TableRow = namedtuple('TableRow', 'text cells links')
+
+class TableView:
+    # Text model of one <table>, built once: the raw table text, one
+    # TableRow per <tr> (cleaned row text, cleaned cell texts, per-cell
+    # (href, text) links) and the (src, width) of every image. score_table
+    # and all parse_* functions read from this instead of the DOM.
+    __slots__ = ('classes', 'text', 'text500', 'rows', 'images')
+
+    def __init__(self, table):
+        self.classes = table.get('class') or []
+        self.text = table.get_text()
+        self.text500 = self.text[:500]
+        seen_cells = {}
+        self.rows = []
+        for tr in table.find_all('tr'):
+            texts = []
+            links = []
+            for c in tr.find_all(['td', 'th']):
+                cell = seen_cells.get(id(c))
+                if cell is None:
+                    cell = (clean_text(c.get_text()),
+                            [(a.get('href', ''), clean_text(a.get_text())) for a in c.find_all('a')])
+                    seen_cells[id(c)] = cell
+                texts.append(cell[0])
+                links.append(cell[1])
+            self.rows.append(TableRow(clean_text(tr.get_text()), texts, links))
+        self.images = [(img.get('src', ''), img.get('width', '0')) for img in table.find_all('img')]
+
+def as_view(table):
+    return table if isinstance(table, TableView) else TableView(table)
+
 def parse_stats_from_roundy(table):
+    table = as_view(table)
     stat_rows = []
-    for row in table.find_all('tr'):
-        cells = row.find_all(['td', 'th'])
-        cell_texts = [clean_text(c.get_text()) for c in cells]
+    for row in table.rows:
+        cell_texts = row.cells
         nums = []
         for ct in cell_texts:
             val = ct.replace(',', '').strip()
@@ -192,12 +372,12 @@ def parse_stats_from_roundy(table):
     return {stat_names[i]: nums[i] for i in range(min(6, len(nums)))}
 
 def parse_info_from_roundy(table):
+    table = as_view(table)
     info = {}
-    for row in table.find_all('tr'):
-        cells = row.find_all(['td', 'th'])
-        if len(cells) < 2:
+    for row in table.rows:
+        if len(row.cells) < 2:
             continue
-        texts = [clean_text(c.get_text()) for c in cells]
+        texts = row.cells
         label = texts[0]
         vals = [x for x in texts[1:] if x and x != label]
         if 'Move type' in label and vals:
@@ -210,23 +390,23 @@ def parse_info_from_roundy(table):
         elif label == 'EX Role' and vals:
             info['ex_role'] = vals[0]
         elif 'Weakness' in ' '.join(texts):
-            for cell in cells:
-                for a in cell.find_all('a'):
-                    if '(type)' in a.get('href', ''):
-                        info['weakness'] = clean_text(a.get_text())
+            for cell_links in row.links:
+                for href, link_text in cell_links:
+                    if '(type)' in href:
+                        info['weakness'] = link_text
                         break
                 if 'weakness' in info:
                     break
     return info
 
 def parse_pokemon_images(table):
+    table = as_view(table)
     images = []
     skip = ['IC_Masters', 'Masters_Special', 'Masters_Physical', 'Masters_Support',
             'Masters_Tech', 'Masters_Field', 'Masters_Sprint', 'Crystal_icon',
             'Mark_Masters', 'EX_star', 'Masters_EX', 'Spr_Masters']
-    for img in table.find_all('img'):
-        src = img.get('src', '')
-        width = int(img.get('width', '0') or 0)
+    for src, width in table.images:
+        width = int(width or 0)
         if width >= 60 and src:
             fn = src.split('/')[-1]
             if any(p in fn for p in skip):
@@ -237,13 +417,13 @@ def parse_pokemon_images(table):
     return images
 
 def parse_moves_table(table):
+    table = as_view(table)
     moves = []
-    rows = table.find_all('tr')
+    rows = table.rows
     hmap = {}
     hidx = -1
     for idx, row in enumerate(rows):
-        cells = row.find_all(['th', 'td'])
-        texts = [clean_text(c.get_text()).lower() for c in cells]
+        texts = [t.lower() for t in row.cells]
         if 'name' in texts and ('type' in texts or 'category' in texts or 'accuracy' in texts):
             hidx = idx
             for ci, txt in enumerate(texts):
@@ -261,10 +441,10 @@ def parse_moves_table(table):
         return moves
     cur_type = "Move"
     for row in rows[hidx + 1:]:
-        cells = row.find_all(['td', 'th'])
+        cells = row.cells
         if not cells:
             continue
-        first = clean_text(cells[0].get_text())
+        first = cells[0]
         if len(cells) <= 3:
             if 'sync move' in first.lower():
                 cur_type = "Sync Move"
@@ -276,19 +456,19 @@ def parse_moves_table(table):
         move = {"move_type": cur_type}
         for key, ci in hmap.items():
             if ci < len(cells):
-                move[key] = clean_text(cells[ci].get_text())
+                move[key] = cells[ci]
         if move.get('name'):
             moves.append(move)
     return moves
 
 def parse_skills_table(table):
+    table = as_view(table)
     passive_skills = []
     theme_skills = []
-    rows = table.find_all('tr')
     section = "passive"
-    for row in rows:
-        cells = row.find_all(['td', 'th'])
-        row_text = clean_text(row.get_text())
+    for row in table.rows:
+        cells = row.cells
+        row_text = row.text
         if 'Passive Skill' in row_text or 'Passive skill' in row_text:
             section = "passive"
             continue
@@ -297,8 +477,8 @@ def parse_skills_table(table):
             continue
         if len(cells) < 2:
             continue
-        name = clean_text(cells[0].get_text())
-        desc = clean_text(cells[1].get_text()) if len(cells) > 1 else ""
+        name = cells[0]
+        desc = cells[1] if len(cells) > 1 else ""
         if not name or name in ['Name', 'Description', 'Skill'] or len(name) <= 1:
             continue
         skill = {"name": name, "description": desc}
@@ -309,11 +489,11 @@ def parse_skills_table(table):
     return passive_skills, theme_skills
 
 def parse_grid_table(table):
+    table = as_view(table)
     grid = []
     hf = False
-    for row in table.find_all('tr'):
-        cells = row.find_all(['td', 'th'])
-        texts = [clean_text(c.get_text()) for c in cells]
+    for row in table.rows:
+        texts = row.cells
         if 'Name' in texts and 'Effect' in texts:
             hf = True
             continue
@@ -322,31 +502,32 @@ def parse_grid_table(table):
                 hf = True
                 continue
             continue
-        if len(cells) < 2:
+        if len(texts) < 2:
             continue
-        name = clean_text(cells[0].get_text())
+        name = texts[0]
         if not name or len(name) <= 1:
             continue
         grid.append({
             "name": name,
-            "effect": clean_text(cells[1].get_text()) if len(cells) > 1 else "",
-            "energy_required": clean_text(cells[2].get_text()) if len(cells) > 2 else "",
-            "sync_orb_required": clean_text(cells[3].get_text()) if len(cells) > 3 else "",
-            "move_level_required": clean_text(cells[4].get_text()) if len(cells) > 4 else ""
+            "effect": texts[1] if len(texts) > 1 else "",
+            "energy_required": texts[2] if len(texts) > 2 else "",
+            "sync_orb_required": texts[3] if len(texts) > 3 else "",
+            "move_level_required": texts[4] if len(texts) > 4 else ""
         })
     return grid
 
 def score_table(table):
-    text = table.get_text()
-    text500 = text[:500]
-    classes = table.get('class') or []
+    table = as_view(table)
+    text = table.text
+    text500 = table.text500
+    classes = table.classes
     scores = {'grid': 0, 'skills': 0, 'moves': 0, 'stats': 0, 'availability': 0}
     if 'Energy required' in text500: scores['grid'] += 100
     if 'Sync orb required' in text500: scores['grid'] += 100
     if 'Move level required' in text500: scores['grid'] += 50
     if 'sortable' in classes: scores['grid'] += 20
-    for row in table.find_all('tr')[:8]:
-        rt = clean_text(row.get_text())
+    for row in table.rows[:8]:
+        rt = row.text
         if ('Passive Skill' in rt or 'Passive skill' in rt) and len(rt) < 60:
             scores['skills'] += 100
             break
@@ -355,7 +536,7 @@ def score_table(table):
     if 'Accuracy' in text500: scores['moves'] += 30
     if 'Target' in text500 and 'Move gauge' in text500: scores['moves'] += 30
     if 'Base Power' in text500 or 'Base power' in text500: scores['moves'] += 20
-    first_rows = ' '.join([clean_text(r.get_text()).lower() for r in table.find_all('tr')[:3]])
+    first_rows = ' '.join([r.text.lower() for r in table.rows[:3]])
     if 'name' in first_rows and 'category' in first_rows: scores['moves'] += 30
     if 'HP' in text: scores['stats'] += 15
     if 'Attack' in text or 'Atk' in text: scores['stats'] += 15
@@ -363,11 +544,10 @@ def score_table(table):
     if 'Speed' in text: scores['stats'] += 15
     if 'Weakness' in text500: scores['stats'] += 20
     if 'Role' in text500 and 'Base Potential' in text500: scores['stats'] += 30
-    for row in table.find_all('tr'):
-        cells = row.find_all(['td', 'th'])
+    for row in table.rows:
         nums = []
-        for c in cells:
-            val = clean_text(c.get_text()).replace(',', '').strip()
+        for ct in row.cells:
+            val = ct.replace(',', '').strip()
             if val.isdigit() and 2 <= len(val) <= 4:
                 nums.append(val)
         if len(nums) >= 6:
@@ -387,9 +567,11 @@ def parse_section_tables(section_tables):
         "pokemon_images": [], "stats": {}, "info": {},
         "moves": [], "passive_skills": [], "theme_skills": [], "sync_grid": []
     }
+    views = [as_view(t) for t in section_tables]
     stats_tables = []
-    for tbl in section_tables:
+    for tbl in views:
         ttype = classify_table(tbl)
+        METRICS.incr('classify.' + ttype)
         if ttype == 'grid' and not result['sync_grid']:
             result['sync_grid'] = parse_grid_table(tbl)
         elif ttype == 'skills' and not result['passive_skills']:
@@ -412,12 +594,13 @@ def parse_section_tables(section_tables):
         if parsed_info:
             result['info'] = parsed_info
     if not result['stats'] or not result['moves'] or not result['passive_skills'] or not result['sync_grid']:
-        for tbl in section_tables:
+        for tbl in views:
             if not result['stats']:
-                tbl_text = tbl.get_text()
+                tbl_text = tbl.text
                 if 'HP' in tbl_text and ('Attack' in tbl_text or 'Atk' in tbl_text):
                     fb = parse_stats_from_roundy(tbl)
                     if fb:
+                        METRICS.incr('classify.fallback.stats')
                         result['stats'] = fb
                         for iu in parse_pokemon_images(tbl):
                             if iu not in result['pokemon_images']:
@@ -426,36 +609,230 @@ def parse_section_tables(section_tables):
                         if fi:
                             result['info'] = fi
             if not result['moves']:
-                tp = tbl.get_text()[:400].lower()
+                tp = tbl.text[:400].lower()
                 if 'name' in tp and 'category' in tp:
                     fm = parse_moves_table(tbl)
                     if fm:
+                        METRICS.incr('classify.fallback.moves')
                         result['moves'] = fm
             if not result['passive_skills']:
-                tp = tbl.get_text()[:400]
+                tp = tbl.text[:400]
                 if 'Passive' in tp and 'Description' in tp:
                     fp, ft = parse_skills_table(tbl)
                     if fp:
+                        METRICS.incr('classify.fallback.skills')
                         result['passive_skills'] = fp
                         result['theme_skills'] = ft
             if not result['sync_grid']:
-                tp = tbl.get_text()[:400]
+                tp = tbl.text[:400]
                 if 'Energy' in tp and ('required' in tp or 'Sync orb' in tp):
                     fg = parse_grid_table(tbl)
                     if fg:
+                        METRICS.incr('classify.fallback.grid')
                         result['sync_grid'] = fg
     return result
 
-def scrape_trainer_page(url):
+def fetch_trainer_page(url, throttle=None, client=None):
     page_name = url.split('/')[-1]
     print("   [FETCH] " + page_name)
+    client = client or get_client()
+    start = time.perf_counter()
     try:
-        res = requests.get(url, headers=HEADERS, timeout=30)
+        if throttle:
+            with throttle.slot(url):
+                res = client.get(url)
+        else:
+            res = client.get(url)
+        METRICS.observe('fetch.seconds', time.perf_counter() - start)
+        METRICS.observe('fetch.bytes', len(res.content))
+        METRICS.incr('fetch.status.' + str(res.status_code))
+        if getattr(res, 'from_cache', False):
+            METRICS.incr('fetch.not_modified')
         if res.status_code == 404:
             return None
         if res.status_code != 200:
+            print("   [ERROR] HTTP " + str(res.status_code) + " " + page_name)
             return None
-        soup = BeautifulSoup(res.text, 'html.parser')
+        return res.text
+    except Exception as e:
+        METRICS.incr('fetch.errors')
+        print("   [ERROR] " + str(e))
+        return None
+
+def section_hash(parser, name, sprite, variant, parts):
+    # Also covers PARSER_VERSION and the HTML parser, so entries stored by an
+    # older parser never match and are re-parsed on refresh.
+    h = hashlib.sha1()
+    for part in ['v' + str(PARSER_VERSION), parser, name, sprite, variant] + parts:
+        h.update(part.encode('utf-8'))
+        h.update(b'\0')
+    return h.hexdigest()
+
+class SectionCache:
+    # parse_section_tables results on disk, one <root>/v<PARSER_VERSION>/ab/<key>.json
+    # per distinct section. Keys hash the HTML parser and the section's HTML
+    # (see parse_trainer_page); bumping PARSER_VERSION moves to a fresh directory and
+    # purge_stale() drops the old ones. Writes are atomic, so parse worker
+    # processes can share one cache.
+    def __init__(self, root=SECTION_CACHE_DIR):
+        self.root = root
+        self.dir = os.path.join(root, 'v' + str(PARSER_VERSION))
+
+    def key(self, parser, parts):
+        h = hashlib.sha1(parser.encode('utf-8'))
+        for part in parts:
+            h.update(b'\0')
+            h.update(part.encode('utf-8'))
+        return h.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.dir, key[:2], key + '.json')
+
+    def get(self, key):
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key, data):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + "." + str(os.getpid()) + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({k: data[k] for k in SECTION_FIELDS}, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    def purge_stale(self):
+        removed = 0
+        if os.path.isdir(self.root):
+            for name in os.listdir(self.root):
+                path = os.path.join(self.root, name)
+                if path != self.dir and os.path.isdir(path):
+                    shutil.rmtree(path, ignore_errors=True)
+                    removed += 1
+        return removed
+
+IGNORED_H2 = frozenset([
+    'in the games', 'appearances', 'quotes', 'gallery', 'trivia',
+    'references', 'related articles', 'in other languages',
+    'voice actors', 'external links', 'see also', 'in animation',
+    'other pok\u00e9mon', 'contents'
+])
+
+def segment_page(parser_output, region=None):
+    # One walk over the top-level children. Each h2 (other than the ignored
+    # ones) opens a section that runs to the next h2 of any kind and collects
+    # its non-infobox tables. Infoboxes (tables, or inside divs) give the
+    # section its own trainer sprite; sections without one inherit the last
+    # sprite seen, starting from the infobox above the first section.
+    # Given the page source region the soup was built from, each section
+    # also gets 'raw': its source text up to the next headline, or None when
+    # the source headings cannot be lined up with the parsed ones.
+    sections = []
+    heads = []
+    current = None
+    pre = ("", "")
+    own = {}
+    for child in parser_output.children:
+        if not isinstance(child, Tag):
+            continue
+        if child.name == 'h2':
+            current = None
+            hl = child.find('span', class_='mw-headline')
+            if hl:
+                name = clean_text(hl.get_text())
+                if name.lower() not in IGNORED_H2:
+                    current = {'name': name, 'tables': [], 'raw': None}
+                    sections.append(current)
+                heads.append((current, hl.get('id')))
+            continue
+        if child.name == 'table':
+            if 'infobox' not in (child.get('class') or []):
+                if current is not None:
+                    current['tables'].append(child)
+                continue
+            infoboxes = [child]
+        elif child.name == 'div':
+            infoboxes = child.find_all('table', class_='infobox')
+        else:
+            continue
+        if current is None and sections:
+            continue
+        for ct in infoboxes:
+            fs = extract_sprite_from_infobox(ct)
+            fv = extract_variant_from_infobox(ct)
+            if fs:
+                if current is None:
+                    pre = (fs, fv)
+                else:
+                    own[current['name']] = (fs, fv)
+    final = {}
+    last = pre
+    for sec in sections:
+        if sec['name'] in own:
+            last = own[sec['name']]
+        final[sec['name']] = last
+    for sec in sections:
+        sec['sprite'], sec['variant'] = final[sec['name']]
+    raw = raw_headings(region) if region is not None else []
+    if len(raw) == len(heads) and all(a is None or b is None or a == b for (_, a), (_, b) in zip(heads, raw)):
+        ends = [start for start, _ in raw[1:]] + [len(region)]
+        for (sec, _), (start, _), end in zip(heads, raw, ends):
+            if sec is not None:
+                sec['raw'] = region[start:end]
+    return sections
+
+def page_selection(page_url, base_name, page_pairs, dex, refreshing=False, extras=True):
+    # What a page is scraped for, in a form that can be sent to a parse
+    # worker: the list pairs to match, and the dex facts that decide which
+    # unmatched sections become extra entries (see wants_extra).
+    prefix = slugify(base_name) + '--'
+    return {
+        'page': page_url, 'base': base_name, 'pairs': page_pairs, 'refreshing': refreshing,
+        'extras': extras, 'pokemon': set(dex.by_page.get(page_url, ())),
+        'ids': {eid: entry_page(dex.db[i]) for eid, i in dex.by_id.items() if eid.startswith(prefix)},
+    }
+
+def wants_extra(select, section_name):
+    # Extras already stored (for a refreshed page: stored from another page)
+    # are skipped, as are sections whose pokemon this page already has under
+    # a prefixed trainer name.
+    if not select['extras']:
+        return False
+    eid = pair_id(select['base'], section_name)
+    if select['refreshing']:
+        return select['ids'].get(eid, select['page']) == select['page']
+    return eid not in select['ids'] and slugify(normalize_pokemon(section_name)) not in select['pokemon']
+
+def selected_sections(sections, select):
+    matcher = SectionMatcher([{'pokemon_section': sec['name'], 'pos': i} for i, sec in enumerate(sections)])
+    chosen = set()
+    for pi in select['pairs']:
+        m = matcher.match(pi)[0]
+        if m:
+            chosen.add(m['pos'])
+    for i, sec in enumerate(sections):
+        if i not in chosen and wants_extra(select, sec['name']):
+            chosen.add(i)
+    return chosen
+
+def parse_trainer_page(html, parser=None, partial=None, known=None, select=None, cache=None):
+    # known maps section hashes to previously parsed entries; sections whose
+    # HTML hashes the same are copied from there instead of re-parsed, and
+    # failing that looked up in the SectionCache when one is given. With a
+    # page_selection, only sections matched by its pairs or wanted as extras
+    # are parsed; the rest come back as {'pokemon_section', ..., 'parsed': False}.
+    if partial is None:
+        partial = PARTIAL_PARSE
+    parser = parser or HTML_PARSER
+    region = slice_content(html)
+    try:
+        with METRICS.timer('parse.soup'):
+            if partial:
+                soup = make_soup(region, parser, SoupStrainer(id='mw-content-text'))
+            else:
+                soup = make_soup(html, parser)
     except Exception as e:
         print("   [ERROR] " + str(e))
         return None
@@ -465,234 +842,1049 @@ def scrape_trainer_page(url):
     parser_output = content.find('div', class_='mw-parser-output')
     if not parser_output:
         parser_output = content
-    ignored_h2 = set([
-        'in the games', 'appearances', 'quotes', 'gallery', 'trivia',
-        'references', 'related articles', 'in other languages',
-        'voice actors', 'external links', 'see also', 'in animation',
-        'other pok\u00e9mon', 'contents'
-    ])
-    all_h2s = []
-    for child in parser_output.children:
-        if isinstance(child, Tag) and child.name == 'h2':
-            hl = child.find('span', class_='mw-headline')
-            if hl:
-                h2_text = clean_text(hl.get_text())
-                if h2_text.lower() not in ignored_h2:
-                    all_h2s.append({'element': child, 'name': h2_text})
-    pre_sprite = ""
-    pre_variant = ""
-    if all_h2s:
-        first_h2_elem = all_h2s[0]['element']
-        for child in parser_output.children:
-            if isinstance(child, Tag):
-                if child == first_h2_elem:
-                    break
-                check_tables = []
-                if child.name == 'table':
-                    check_tables.append(child)
-                if child.name == 'div':
-                    check_tables.extend(child.find_all('table', class_='infobox'))
-                for ct in check_tables:
-                    if 'infobox' in (ct.get('class') or []):
-                        fs = extract_sprite_from_infobox(ct)
-                        fv = extract_variant_from_infobox(ct)
-                        if fs:
-                            pre_sprite = fs
-                            pre_variant = fv
-    section_own_sprites = {}
-    for h2d in all_h2s:
-        curr = h2d['element'].next_sibling
-        while curr:
-            if isinstance(curr, Tag):
-                if curr.name == 'h2':
-                    break
-                check_tables = []
-                if curr.name == 'table':
-                    check_tables.append(curr)
-                if curr.name == 'div':
-                    check_tables.extend(curr.find_all('table', class_='infobox'))
-                for ct in check_tables:
-                    if 'infobox' in (ct.get('class') or []):
-                        fs = extract_sprite_from_infobox(ct)
-                        fv = extract_variant_from_infobox(ct)
-                        if fs:
-                            section_own_sprites[h2d['name']] = (fs, fv)
-            curr = curr.next_sibling
-    final_sprites = {}
-    last_s = pre_sprite
-    last_v = pre_variant
-    for h2d in all_h2s:
-        n = h2d['name']
-        if n in section_own_sprites:
-            s, v = section_own_sprites[n]
-            final_sprites[n] = (s, v)
-            last_s = s
-            last_v = v
-        else:
-            final_sprites[n] = (last_s, last_v)
+    sections = segment_page(parser_output, region)
+    chosen = selected_sections(sections, select) if select is not None else None
     results = []
-    for h2d in all_h2s:
-        h2_elem = h2d['element']
-        pokemon_name = h2d['name']
-        sprite_url, variant_name = final_sprites.get(pokemon_name, ("", ""))
-        print("   Pokemon: " + pokemon_name)
-        section_tables = []
-        curr = h2_elem.next_sibling
-        while curr:
-            if isinstance(curr, Tag):
-                if curr.name == 'h2':
-                    break
-                if curr.name == 'table':
-                    tc = curr.get('class') or []
-                    if 'infobox' not in tc:
-                        section_tables.append(curr)
-            curr = curr.next_sibling
-        pair_data = parse_section_tables(section_tables)
+    for i, sec in enumerate(sections):
+        pokemon_name = sec['name']
+        sprite_url, variant_name = sec['sprite'], sec['variant']
+        section_tables = sec['tables']
+        METRICS.incr('parse.sections')
+        if chosen is not None and i not in chosen:
+            print("   Pokemon: " + pokemon_name + " (skipped)")
+            METRICS.incr('parse.sections_skipped')
+            results.append({'pokemon_section': pokemon_name, 'trainer_sprite': sprite_url,
+                            'trainer_variant': variant_name, 'section_hash': None, 'parsed': False})
+            continue
+        # Sections are hashed by their source text; re-serializing the tables
+        # is the fallback, and only done when a refresh or the cache needs it.
+        parts = [sec['raw']] if sec['raw'] is not None else None
+        if parts is None and (known or cache):
+            parts = [str(t) for t in section_tables]
+        sh = section_hash(parser, pokemon_name, sprite_url, variant_name, parts) if parts else None
+        pair_data = None
+        if known and sh in known:
+            print("   Pokemon: " + pokemon_name + " (unchanged)")
+            METRICS.incr('parse.sections_reused')
+            pair_data = {k: known[sh][k] for k in SECTION_FIELDS}
+        elif cache:
+            ck = cache.key(parser, parts)
+            pair_data = cache.get(ck)
+            if pair_data is not None:
+                print("   Pokemon: " + pokemon_name + " (cached)")
+                METRICS.incr('parse.cache_hits')
+            else:
+                METRICS.incr('parse.cache_misses')
+        if pair_data is None:
+            print("   Pokemon: " + pokemon_name)
+            with METRICS.timer('parse.tables'):
+                pair_data = parse_section_tables(section_tables)
+            if cache:
+                cache.put(ck, pair_data)
         pair_data['pokemon_section'] = pokemon_name
         pair_data['trainer_sprite'] = sprite_url
         pair_data['trainer_variant'] = variant_name
+        pair_data['section_hash'] = sh
         missing = []
         if not pair_data['stats']: missing.append('stats')
         if not pair_data['moves']: missing.append('moves')
         if not pair_data['trainer_sprite']: missing.append('sprite')
         if missing:
+            for field in missing:
+                METRICS.incr('parse.missing.' + field)
             print("      ! Missing: " + ", ".join(missing))
         else:
             print("      * OK")
         results.append(pair_data)
     return results
 
-def match_pair_to_section(pair_info, page_results):
-    pokemon_clean = pair_info['pokemon_clean'].lower().strip()
-    anchor = pair_info.get('anchor', '').lower().replace('_', ' ')
-    best_match = None
-    best_score = 0
-    for section in page_results:
-        section_name = section['pokemon_section']
-        section_names = get_section_pokemon_names(section_name)
-        section_lower = section_name.lower().strip()
-        section_simple = re.sub(r'\s*\(.*?\)', '', section_lower).strip()
-        if anchor:
-            anchor_clean = anchor.replace('_', ' ').lower()
-            if anchor_clean == section_lower or anchor_clean == section_lower.replace(' ', '_'):
-                return section
-            for sn in section_names:
-                if anchor_clean == sn or anchor_clean == sn.replace(' ', '_'):
-                    return section
-            if section_simple in anchor_clean or anchor_clean in section_lower:
-                if 200 > best_score:
-                    best_match, best_score = section, 200
+class SectionMatcher:
+    # Matches list pairs to the sections of one page. Section names are
+    # normalized once into alias indexes (first section per key wins), so an
+    # exact anchor or name hit is a dict lookup; the substring scoring only
+    # runs when neither hits. match() returns (section, score, reason):
+    # exact anchor hits score 1000, exact name hits 500, partial hits their
+    # heuristic score; (None, 0, None) when nothing matched.
+    def __init__(self, page_results):
+        self.sections = []
+        self.anchor_keys = {}
+        self.name_keys = {}
+        for i, section in enumerate(page_results):
+            names = get_section_pokemon_names(section['pokemon_section'])
+            lower = section['pokemon_section'].lower().strip()
+            simple = re.sub(r'\s*\(.*?\)', '', lower).strip()
+            self.sections.append((section, lower, simple, names))
+            self.anchor_keys.setdefault(lower, i)
+            for n in names:
+                self.anchor_keys.setdefault(n, i)
+                self.name_keys.setdefault(n, i)
+
+    def match(self, pair_info):
+        pokemon_clean = pair_info['pokemon_clean'].lower().strip()
+        anchor = pair_info.get('anchor', '').lower().replace('_', ' ')
+        by_anchor = self.anchor_keys.get(anchor) if anchor else None
+        by_name = self.name_keys.get(pokemon_clean)
+        if by_anchor is not None and (by_name is None or by_anchor <= by_name):
+            return self.sections[by_anchor][0], 1000, 'anchor'
+        if by_name is not None:
+            return self.sections[by_name][0], 500, 'name'
+        return self.score(pokemon_clean, anchor)
+
+    def score(self, pokemon_clean, anchor):
+        best_match, best_score, best_reason = None, 0, None
+        pokemon_base = re.sub(r'\s*(gigantamax|mega)\s*.*$', '', pokemon_clean, flags=re.I).strip()
+        for section, section_lower, section_simple, section_names in self.sections:
+            candidates = []
+            if anchor:
+                if section_simple in anchor or anchor in section_lower:
+                    candidates.append((200, 'anchor_partial'))
+                for sn in section_names:
+                    if sn in anchor or anchor in sn:
+                        candidates.append((190, 'anchor_partial'))
+            if pokemon_clean in section_lower:
+                candidates.append((len(pokemon_clean) * 10, 'name_in_section'))
             for sn in section_names:
-                if sn in anchor_clean or anchor_clean in sn:
-                    if 190 > best_score:
-                        best_match, best_score = section, 190
-        if pokemon_clean in section_names:
-            return section
-        if pokemon_clean in section_lower:
-            score = len(pokemon_clean) * 10
-            if score > best_score:
-                best_match, best_score = section, score
-        for sn in section_names:
-            if sn and pokemon_clean in sn:
-                score = len(pokemon_clean) * 9
-                if score > best_score:
-                    best_match, best_score = section, score
-            if sn and sn in pokemon_clean:
-                score = len(sn) * 8
+                if sn and pokemon_clean in sn:
+                    candidates.append((len(pokemon_clean) * 9, 'name_in_alias'))
+                if sn and sn in pokemon_clean:
+                    candidates.append((len(sn) * 8, 'alias_in_name'))
+            if section_simple and section_simple in pokemon_clean:
+                candidates.append((len(section_simple) * 8, 'alias_in_name'))
+            if pokemon_base:
+                if pokemon_base in section_names:
+                    candidates.append((95, 'base_form'))
+                if pokemon_base == section_simple:
+                    candidates.append((90, 'base_form'))
+            for score, reason in candidates:
                 if score > best_score:
-                    best_match, best_score = section, score
-        if section_simple and section_simple in pokemon_clean:
-            score = len(section_simple) * 8
-            if score > best_score:
-                best_match, best_score = section, score
-        pokemon_base = re.sub(r'\s*(gigantamax|mega)\s*.*$', '', pokemon_clean, flags=re.I).strip()
-        if pokemon_base:
-            if pokemon_base in section_names and 95 > best_score:
-                best_match, best_score = section, 95
-            if pokemon_base == section_simple and 90 > best_score:
-                best_match, best_score = section, 90
-    return best_match
+                    best_match, best_score, best_reason = section, score, reason
+        return best_match, best_score, best_reason
 
 
 # ================================================================
-# SAFETY
+# FETCHING
 # ================================================================
-def load_existing_db():
+def parse_retry_after(value):
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+class HttpCache:
+    # On-disk store of response bodies plus their validators (ETag /
+    # Last-Modified), one <sha1(url)>.json + .body pair per URL.
+    def __init__(self, root=CACHE_DIR, max_age=CACHE_MAX_AGE, max_bytes=CACHE_MAX_BYTES):
+        self.root = root
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, url, ext):
+        return os.path.join(self.root, hashlib.sha1(url.encode('utf-8')).hexdigest() + ext)
+
+    def _write(self, path, data):
+        tmp = path + ".tmp"
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def load(self, url):
+        try:
+            with open(self._path(url, '.json'), 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(self._path(url, '.body'), 'rb') as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None, None
+        if hashlib.sha256(body).hexdigest() != meta.get('sha256'):
+            return None, None
+        return meta, body
+
+    def save_meta(self, url, meta):
+        self._write(self._path(url, '.json'), json.dumps(meta).encode('utf-8'))
+
+    def store(self, url, res):
+        body = res.content
+        meta = {
+            'url': url, 'etag': res.headers.get('ETag'),
+            'last_modified': res.headers.get('Last-Modified'),
+            'encoding': res.encoding, 'content_type': res.headers.get('Content-Type'),
+            'sha256': hashlib.sha256(body).hexdigest(), 'stored': time.time(), 'used': time.time()
+        }
+        old, _ = self.load(url)
+        if old and old.get('processed'):
+            meta['processed'] = old['processed']
+        self._write(self._path(url, '.body'), body)
+        self.save_meta(url, meta)
+        return meta
+
+    def conditional_headers(self, meta):
+        headers = {}
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+
+    def is_processed(self, url, sha256, db_count):
+        meta, _ = self.load(url)
+        return bool(meta) and meta.get('processed') == {'sha256': sha256, 'db_count': db_count}
+
+    def mark_processed(self, url, sha256, db_count):
+        meta, _ = self.load(url)
+        if meta and meta.get('sha256') == sha256:
+            meta['processed'] = {'sha256': sha256, 'db_count': db_count}
+            self.save_meta(url, meta)
+
+    def evict(self):
+        now = time.time()
+        entries = []
+        for fn in os.listdir(self.root):
+            if not fn.endswith('.json'):
+                continue
+            meta_path = os.path.join(self.root, fn)
+            body_path = meta_path[:-5] + '.body'
+            try:
+                with open(meta_path, 'r', encoding='utf-8') as f:
+                    used = json.load(f).get('used', 0)
+                size = os.path.getsize(body_path)
+            except (OSError, ValueError):
+                used, size = 0, 0
+            entries.append((used, size, meta_path, body_path))
+        entries.sort()
+        total = sum(e[1] for e in entries)
+        removed = 0
+        for used, size, meta_path, body_path in entries:
+            if now - used <= self.max_age and total <= self.max_bytes:
+                continue
+            for path in (meta_path, body_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            total -= size
+            removed += 1
+        return removed
+
+def cached_response(url, meta, body):
+    res = requests.Response()
+    res.status_code = 200
+    res._content = body
+    res.url = url
+    res.encoding = meta.get('encoding')
+    if meta.get('content_type'):
+        res.headers['Content-Type'] = meta['content_type']
+    res.from_cache = True
+    res.body_hash = meta['sha256']
+    return res
+
+class HttpArchive:
+    # Record/replay of fetched responses in a gzipped JSON Lines file, one
+    # gzip member per response so an interrupted recording stays readable.
+    # In replay mode every request is answered from the archive (last
+    # recording of the URL wins) and unknown URLs get a 404.
+    def __init__(self, path, replay=False):
+        self.path = path
+        self.replay = replay
+        self.lock = threading.Lock()
+        self.responses = {}
+        if replay:
+            for rec in self.read(path):
+                self.responses[rec['url']] = rec
+            print("Replay: " + str(len(self.responses)) + " responses from " + path)
+
+    @staticmethod
+    def read(path):
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            try:
+                for line in f:
+                    yield json.loads(line)
+            except (EOFError, ValueError):
+                return
+
+    def record(self, url, res):
+        rec = {
+            'url': url, 'status': res.status_code, 'headers': dict(res.headers),
+            'encoding': res.encoding, 'time': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'body': base64.b64encode(res.content).decode('ascii')
+        }
+        data = gzip.compress((json.dumps(rec) + "\n").encode('utf-8'))
+        with self.lock:
+            with open(self.path, 'ab') as f:
+                f.write(data)
+
+    def response(self, url):
+        rec = self.responses.get(url)
+        res = requests.Response()
+        res.url = url
+        res.from_cache = True
+        if rec is None:
+            res.status_code = 404
+            res._content = b''
+            return res
+        res.status_code = rec['status']
+        res._content = base64.b64decode(rec['body'])
+        res.headers.update(rec['headers'])
+        res.encoding = rec['encoding']
+        res.body_hash = hashlib.sha256(res._content).hexdigest()
+        return res
+
+def enter_replay_dir(root):
+    # Replays run against a copy of the current DB in their own directory,
+    # so the published store, JSON, feed and API tree are never touched.
+    # The copy is refreshed on every replay; root becomes the working
+    # directory, so every relative output path lands under it.
+    os.makedirs(root, exist_ok=True)
+    store_copy = os.path.join(root, STORE_DIR)
+    json_copy = os.path.join(root, OUTPUT_FILE)
+    if os.path.isdir(store_copy):
+        shutil.rmtree(store_copy)
+    if os.path.exists(json_copy):
+        os.remove(json_copy)
+    if os.path.isdir(STORE_DIR):
+        shutil.copytree(STORE_DIR, store_copy)
     if os.path.exists(OUTPUT_FILE):
+        shutil.copy2(OUTPUT_FILE, json_copy)
+    os.chdir(root)
+    print("Replay: writing outputs under " + os.getcwd())
+
+class HttpClient:
+    # One keep-alive session for every request of a run. Retries 429/5xx and
+    # connection errors/timeouts with jittered exponential backoff, honoring
+    # Retry-After, and keeps running latency/byte totals.
+    def __init__(self, pool_size=DEFAULT_WORKERS, retries=HTTP_RETRIES,
+                 backoff=HTTP_BACKOFF, timeout=HTTP_TIMEOUT, cache=None, archive=None):
+        self.cache = cache
+        self.archive = archive
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update(HEADERS)
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=max(1, pool_size))
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.observer = None
+        self.lock = threading.Lock()
+        self.stats = {'requests': 0, 'retries': 0, 'errors': 0, 'bytes': 0, 'seconds': 0.0, 'not_modified': 0}
+
+    def _record(self, url, status, size, elapsed):
+        with self.lock:
+            self.stats['requests'] += 1
+            self.stats['bytes'] += size
+            self.stats['seconds'] += elapsed
+            if status is None or status >= 400:
+                self.stats['errors'] += 1
+
+    def _backoff_delay(self, attempt):
+        cap = min(HTTP_BACKOFF_MAX, self.backoff * (2 ** attempt))
+        return cap / 2 + random.uniform(0, cap / 2)
+
+    def get(self, url, headers=None, use_cache=True):
+        if self.archive and self.archive.replay:
+            return self.archive.response(url)
+        res = self._cached_get(url, headers, use_cache)
+        if self.archive:
+            self.archive.record(url, res)
+        return res
+
+    def _cached_get(self, url, headers=None, use_cache=True):
+        if not self.cache or not use_cache:
+            return self._get(url, headers)
+        meta, body = self.cache.load(url)
+        if meta:
+            headers = dict(headers or {}, **self.cache.conditional_headers(meta))
+        res = self._get(url, headers)
+        if res.status_code == 304 and meta:
+            with self.lock:
+                self.stats['not_modified'] += 1
+            meta['used'] = time.time()
+            self.cache.save_meta(url, meta)
+            return cached_response(url, meta, body)
+        if res.status_code == 200:
+            meta = self.cache.store(url, res)
+            res.body_hash = meta['sha256']
+        res.from_cache = False
+        return res
+
+    def _get(self, url, headers=None):
+        attempt = 0
+        while True:
+            start = time.monotonic()
+            try:
+                res = self.session.get(url, headers=headers, timeout=self.timeout)
+            except requests.RequestException as e:
+                self._record(url, None, 0, time.monotonic() - start)
+                if self.observer:
+                    self.observer.observe(url, None, time.monotonic() - start)
+                if attempt >= self.retries or not isinstance(e, RETRY_EXCEPTIONS):
+                    raise
+                delay = self._backoff_delay(attempt)
+            else:
+                self._record(url, res.status_code, len(res.content), time.monotonic() - start)
+                retry_after = None
+                if res.status_code in RETRY_STATUSES:
+                    retry_after = parse_retry_after(res.headers.get('Retry-After'))
+                if self.observer:
+                    self.observer.observe(url, res.status_code, time.monotonic() - start, retry_after)
+                if res.status_code not in RETRY_STATUSES or attempt >= self.retries:
+                    return res
+                delay = retry_after
+                if delay is None:
+                    delay = self._backoff_delay(attempt)
+                delay = min(delay, HTTP_BACKOFF_MAX)
+            with self.lock:
+                self.stats['retries'] += 1
+            attempt += 1
+            time.sleep(delay)
+
+    def summary(self):
+        st = self.stats
+        avg = (st['seconds'] / st['requests'] * 1000) if st['requests'] else 0
+        return ("HTTP: " + str(st['requests']) + " requests, " + str(st['bytes'] // 1024) + " KB, avg "
+                + str(int(avg)) + " ms, " + str(st['not_modified']) + " not modified, "
+                + str(st['retries']) + " retries, " + str(st['errors']) + " errors")
+
+_client = None
+
+def get_client():
+    global _client
+    if _client is None:
+        _client = HttpClient()
+    return _client
+
+def set_client(client):
+    global _client
+    _client = client
+    return client
+
+def extract_revision_id(html):
+    m = re.search(r'"wgRevisionId":\s*(\d+)', html[:200000])
+    return int(m.group(1)) if m else None
+
+def page_title(page_url):
+    return unquote(page_url.split('/wiki/')[-1]).replace('_', ' ')
+
+def get_page_revisions(page_urls, client=None, api_url=None):
+    # Current revision ID per page URL, via the MediaWiki revisions API in
+    # batches of API_BATCH titles. Missing pages are left out.
+    client = client or get_client()
+    by_title = {}
+    for url in page_urls:
+        by_title[page_title(url)] = url
+    titles = list(by_title)
+    revids = {}
+    for i in range(0, len(titles), API_BATCH):
+        params = {
+            'action': 'query', 'prop': 'revisions', 'rvprop': 'ids', 'redirects': 1,
+            'titles': '|'.join(titles[i:i + API_BATCH]), 'format': 'json', 'formatversion': 2
+        }
+        res = client.get((api_url or API_URL) + "?" + urlencode(params), use_cache=False)
+        if res.status_code != 200:
+            raise RuntimeError("revision API returned HTTP " + str(res.status_code))
+        query = res.json().get('query', {})
+        origin = {}
+        for m in query.get('normalized', []) + query.get('redirects', []):
+            origin[m['to']] = origin.get(m['from'], m['from'])
+        pages = query.get('pages', [])
+        if isinstance(pages, dict):
+            pages = list(pages.values())
+        for pg in pages:
+            revs = pg.get('revisions') or []
+            if not revs:
+                continue
+            title = origin.get(pg['title'], pg['title']).replace('_', ' ')
+            if title in by_title:
+                revids[by_title[title]] = revs[0]['revid']
+    return revids
+
+def find_changed_pages(db, client=None, api_url=None):
+    stored = {}
+    for entry in db:
+        url = entry_page(entry)
+        if url:
+            stored.setdefault(url, set()).add(entry.get('_revid'))
+    current = get_page_revisions(list(stored), client, api_url)
+    changed = [u for u in stored if u in current and stored[u] != {current[u]}]
+    return changed, current
+
+class HostThrottle:
+    # Per-host politeness budget: at most max_in_flight concurrent requests
+    # and request starts spaced at least delay seconds apart.
+    def __init__(self, delay=HOST_DELAY, max_in_flight=HOST_MAX_IN_FLIGHT):
+        self.delay = delay
+        self.max_in_flight = max(1, max_in_flight)
+        self.lock = threading.Lock()
+        self.slots = {}
+        self.next_start = {}
+
+    @contextmanager
+    def slot(self, url):
+        host = urlparse(url).netloc
+        with self.lock:
+            if host not in self.slots:
+                self.slots[host] = threading.BoundedSemaphore(self.max_in_flight)
+            sem = self.slots[host]
+        sem.acquire()
+        try:
+            with self.lock:
+                now = time.monotonic()
+                start = max(now, self.next_start.get(host, now))
+                self.next_start[host] = start + self.delay
+            if start > now:
+                time.sleep(start - now)
+            yield
+        finally:
+            sem.release()
+
+class CircuitOpen(RuntimeError):
+    pass
+
+class AdaptiveThrottle(HostThrottle):
+    # AIMD per host, fed by HttpClient.observer with every attempt's outcome.
+    # A healthy response adds 1/limit to the in-flight limit (up to
+    # max_limit) and trims the delay by a tenth; a 429/503, a Retry-After or
+    # a latency spike (ADAPT_LATENCY_FACTOR x the running average) halves the
+    # limit, doubles the delay and holds the host for at least Retry-After.
+    # The circuit breaker watches the last BREAKER_WINDOW outcomes: at
+    # BREAKER_ERROR_RATE failures (5xx or no response) it stops all requests to the host for a
+    # cooldown (doubled per consecutive trip), then lets one probe through.
+    # After BREAKER_MAX_TRIPS failed probes in a row requests raise
+    # CircuitOpen, so the remaining pages fail fast.
+    def __init__(self, delay=HOST_DELAY, max_in_flight=HOST_MAX_IN_FLIGHT, max_limit=DEFAULT_WORKERS,
+                 min_delay=ADAPT_MIN_DELAY, max_delay=ADAPT_MAX_DELAY, cooldown=BREAKER_COOLDOWN):
+        super().__init__(delay, max_in_flight)
+        self.max_limit = max(self.max_in_flight, max_limit)
+        self.min_delay = min(min_delay, delay)
+        self.max_delay = max(max_delay, delay)
+        self.cooldown = cooldown
+        self.cond = threading.Condition(self.lock)
+        self.hosts = {}
+
+    def _host(self, host):
+        h = self.hosts.get(host)
+        if h is None:
+            h = self.hosts[host] = {
+                'limit': float(self.max_in_flight), 'delay': self.delay, 'in_flight': 0, 'next_start': 0.0,
+                'latency': None, 'window': deque(maxlen=BREAKER_WINDOW), 'state': 'closed',
+                'open_until': 0.0, 'trips': 0, 'probing': False
+            }
+        return h
+
+    @contextmanager
+    def slot(self, url):
+        host = urlparse(url).netloc
+        with self.cond:
+            h = self._host(host)
+            while True:
+                now = time.monotonic()
+                if h['state'] == 'open':
+                    if h['trips'] > BREAKER_MAX_TRIPS:
+                        raise CircuitOpen("circuit open for " + host)
+                    if now < h['open_until']:
+                        self.cond.wait(h['open_until'] - now)
+                        continue
+                    h['state'] = 'half_open'
+                    METRICS.incr('breaker.half_open')
+                probe = h['state'] == 'half_open'
+                if probe:
+                    if not h['probing'] and not h['in_flight']:
+                        h['probing'] = True
+                        break
+                elif h['in_flight'] < int(h['limit']):
+                    break
+                self.cond.wait()
+            h['in_flight'] += 1
+            start = max(now, h['next_start'])
+            h['next_start'] = start + h['delay']
+        try:
+            if start > now:
+                time.sleep(start - now)
+            yield
+        finally:
+            with self.cond:
+                h['in_flight'] -= 1
+                if probe and h['probing']:
+                    # The probe ended without an observed response (an
+                    # exception observe() never saw): count it as failed.
+                    h['probing'] = False
+                    self._trip(h, host)
+                self.cond.notify_all()
+
+    def _trip(self, h, host):
+        h['trips'] += 1
+        h['state'] = 'open'
+        h['open_until'] = time.monotonic() + self.cooldown * 2 ** (h['trips'] - 1)
+        h['window'].clear()
+        METRICS.incr('breaker.open')
+        print("   [BREAKER] " + host + " failing, pausing " + str(round(self.cooldown * 2 ** (h['trips'] - 1), 1)) + "s")
+
+    def observe(self, url, status, seconds, retry_after=None):
+        host = urlparse(url).netloc
+        failed = status is None or status >= 500
+        with self.cond:
+            h = self._host(host)
+            avg = h['latency']
+            slow = avg is not None and seconds > max(avg * ADAPT_LATENCY_FACTOR, ADAPT_SLOW_FLOOR)
+            h['latency'] = seconds if avg is None else avg * 0.8 + seconds * 0.2
+            if status in (429, 503) or retry_after is not None or slow:
+                h['limit'] = max(1.0, h['limit'] / 2)
+                h['delay'] = min(self.max_delay, max(h['delay'] * 2, self.min_delay, retry_after or 0))
+                h['next_start'] = max(h['next_start'], time.monotonic() + max(h['delay'], retry_after or 0))
+                METRICS.incr('throttle.decrease')
+            elif not failed:
+                h['limit'] = min(float(self.max_limit), h['limit'] + 1 / h['limit'])
+                h['delay'] = max(self.min_delay, h['delay'] * 0.9)
+                METRICS.incr('throttle.increase')
+            METRICS.observe('throttle.limit', round(h['limit'], 2))
+            METRICS.observe('throttle.delay', round(h['delay'], 3))
+            h['window'].append(failed)
+            if h['state'] == 'half_open' and h['probing']:
+                h['probing'] = False
+                if failed:
+                    self._trip(h, host)
+                else:
+                    h['state'] = 'closed'
+                    h['trips'] = 0
+                    METRICS.incr('breaker.close')
+            elif (h['state'] == 'closed' and len(h['window']) >= BREAKER_MIN_SAMPLES
+                  and sum(h['window']) >= BREAKER_ERROR_RATE * len(h['window'])):
+                self._trip(h, host)
+            self.cond.notify_all()
+
+def iter_trainer_pages(urls, workers=DEFAULT_WORKERS, serial=False, throttle=None, client=None):
+    # Yields (url, html) in input order. With a pool, downloads run ahead of
+    # the caller so fetching overlaps with parsing of earlier pages.
+    if throttle is None:
+        throttle = HostThrottle()
+    if serial or workers <= 1:
+        for url in urls:
+            yield url, fetch_trainer_page(url, throttle, client)
+        return
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(fetch_trainer_page, url, throttle, client) for url in urls]
+        try:
+            for url, fut in zip(urls, futures):
+                yield url, fut.result()
+        finally:
+            for fut in futures:
+                fut.cancel()
+
+
+# ================================================================
+# PARSING
+# ================================================================
+def parse_page_job(html, parser=None, partial=None, known=None, select=None, section_cache=None):
+    # Runs in a worker process: returns the plain-dict section list plus the
+    # log text, so the main process can print logs in page order.
+    # section_cache is the SectionCache directory, if any.
+    # In a worker process its metrics are returned too, for the parent to merge.
+    worker = multiprocessing.parent_process() is not None
+    if worker:
+        METRICS.reset()
+    out = io.StringIO()
+    with redirect_stdout(out):
+        try:
+            with METRICS.timer('parse.page'):
+                cache = SectionCache(section_cache) if section_cache else None
+                results = parse_trainer_page(html, parser, partial, known, select, cache)
+        except Exception as e:
+            METRICS.incr('parse.errors')
+            print("   ERROR: " + str(e))
+            results = None
+    return results, out.getvalue(), METRICS.snapshot() if worker else None
+
+def job_output(res):
+    results, log, snap = res
+    if snap:
+        METRICS.merge(snap)
+    return results, log
+
+def iter_parsed_pages(fetched, parse_workers=PARSE_WORKERS, known_sections=None, selections=None,
+                      section_cache=None):
+    # Consumes (url, html) pairs and yields (url, html, results, log) in the
+    # same order. Parsing is handed to a process pool when parse_workers > 0;
+    # if the pool cannot start or breaks, pages are parsed in-process.
+    args = (HTML_PARSER, PARTIAL_PARSE)
+    known_sections = known_sections or {}
+    selections = selections or {}
+    pool = None
+    if parse_workers > 0:
+        try:
+            pool = ProcessPoolExecutor(parse_workers, mp_context=multiprocessing.get_context('spawn'))
+        except (OSError, ValueError, NotImplementedError) as e:
+            print("   [PARSE] process pool unavailable, parsing in-process: " + str(e))
+    if pool is None:
+        for url, html in fetched:
+            if html is None:
+                yield url, None, None, ""
+            else:
+                yield (url, html) + job_output(parse_page_job(html, *args, known_sections.get(url), selections.get(url), section_cache))
+        return
+
+    def resolve(item):
+        url, html, fut = item
+        if html is None:
+            return url, None, None, ""
+        if fut is not None:
+            try:
+                return (url, html) + job_output(fut.result())
+            except BrokenProcessPool:
+                print("   [PARSE] process pool broke, parsing in-process")
+        return (url, html) + job_output(parse_page_job(html, *args, known_sections.get(url), selections.get(url), section_cache))
+
+    pending = []
+    broken = False
+    try:
+        for url, html in fetched:
+            fut = None
+            if html is not None and not broken:
+                try:
+                    fut = pool.submit(parse_page_job, html, *args, known_sections.get(url), selections.get(url),
+                                      section_cache)
+                except (BrokenProcessPool, RuntimeError):
+                    broken = True
+            pending.append((url, html, fut))
+            while len(pending) > parse_workers * 2:
+                yield resolve(pending.pop(0))
+        while pending:
+            yield resolve(pending.pop(0))
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+# ================================================================
+# SAFETY
+# ================================================================
+def export_legacy_json(db, path=OUTPUT_FILE):
+    # Streams db to the classic masters_dex_all.json layout; the bytes match
+    # json.dump(db, f, ensure_ascii=False, indent=4).
+    tmp = path + ".tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        if not db:
+            f.write("[]")
+        else:
+            f.write("[\n    ")
+            for i, entry in enumerate(db):
+                if i:
+                    f.write(",\n    ")
+                f.write(json.dumps(entry, ensure_ascii=False, indent=4).replace("\n", "\n    "))
+            f.write("\n]")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+def iter_existing_db(store=None):
+    # Yields entries one at a time from the store, or from the legacy JSON
+    # file when no store has been written yet.
+    if store is None:
+        store = DexStore()
+    if store.exists():
+        for entry in store.iter_entries():
+            yield entry
+    elif os.path.exists(OUTPUT_FILE):
+        with open(OUTPUT_FILE, 'r', encoding='utf-8') as f:
+            db = json.load(f)
+        if isinstance(db, list):
+            for entry in db:
+                yield entry
+
+def load_index(store=None):
+    # Builds the DexIndex straight from the entry stream; the legacy JSON is
+    # the fallback when the store can't be read.
+    if store is None:
+        store = DexStore()
+    dex = None
+    try:
+        dex = DexIndex(iter_existing_db(store))
+        if dex.db:
+            print("Existing DB: " + str(len(dex.db)) + " pairs" + (" (store)" if store.exists() else ""))
+    except Exception as e:
+        print("WARNING: " + str(e))
+    if dex is None and store.exists() and os.path.exists(OUTPUT_FILE):
         try:
             with open(OUTPUT_FILE, 'r', encoding='utf-8') as f:
                 db = json.load(f)
             if isinstance(db, list):
-                print("Existing DB: " + str(len(db)) + " pairs")
-                return db
+                print("Existing DB: " + str(len(db)) + " pairs (legacy export)")
+                store.manifest = None
+                dex = DexIndex(db)
         except Exception as e:
             print("WARNING: " + str(e))
-    return []
+    if dex is None:
+        return DexIndex([])
+    if dex.duplicates:
+        print("   Collapsed " + str(dex.duplicates) + " duplicate entries")
+    return dex
 
-def create_backup():
-    if os.path.exists(OUTPUT_FILE):
-        shutil.copy2(OUTPUT_FILE, BACKUP_FILE)
-        print("Backup: " + BACKUP_FILE)
+def entry_id(entry):
+    return pair_id(entry.get('trainer', ''), entry.get('pokemon', ''))
 
-def restore_backup():
-    if os.path.exists(BACKUP_FILE):
-        shutil.copy2(BACKUP_FILE, OUTPUT_FILE)
-        print("RESTORED from backup!")
+def entry_page(entry):
+    return entry.get('url', '').split('#')[0]
 
-def get_existing_keys(db):
-    keys = set()
-    for entry in db:
-        t = entry.get('trainer', '')
-        p = entry.get('pokemon', '').split('\u2192')[-1].strip()
-        p = re.sub(r'[\u2642\u2640]', '', p).strip()
-        keys.add(t + "|" + p)
-    return keys
+class DexIndex:
+    # Builds the DB list from an entry stream and indexes it by stable pair
+    # ID, plus the set of normalized pokemon already stored per page URL.
+    # Entries loaded without an "id" get one. Duplicate IDs in a legacy file
+    # are collapsed to the first; every later position then shifts, so it is
+    # marked dirty for the next save.
+    def __init__(self, entries):
+        self.db = []
+        self.by_id = {}
+        self.by_page = {}
+        self.dirty = set()
+        self.duplicates = 0
+        for entry in entries:
+            if 'id' not in entry:
+                entry = dict([('id', entry_id(entry))] + list(entry.items()))
+                self.dirty.add(len(self.db))
+            if entry['id'] in self.by_id:
+                self.duplicates += 1
+                continue
+            if self.duplicates:
+                self.dirty.add(len(self.db))
+            self.db.append(entry)
+            self._index(len(self.db) - 1, entry)
+
+    def _index(self, i, entry):
+        self.by_id[entry['id']] = i
+        self.by_page.setdefault(entry_page(entry), set()).add(slugify(normalize_pokemon(entry.get('pokemon', ''))))
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def __contains__(self, eid):
+        return eid in self.by_id
+
+    def upsert(self, entry):
+        eid = entry['id']
+        i = self.by_id.get(eid)
+        if i is None:
+            self.db.append(entry)
+            self._index(len(self.db) - 1, entry)
+            self.dirty.add(len(self.db) - 1)
+            return 'added'
+        old = self.db[i]
+        if public_fields(old) == public_fields(entry):
+            meta = [(k, v) for k, v in entry.items() if k.startswith('_')]
+            if any(old.get(k) != v for k, v in meta):
+                old.update(meta)
+                self.dirty.add(i)
+            return 'unchanged'
+        self.db[i] = entry
+        self._index(i, entry)
+        self.dirty.add(i)
+        return 'updated'
 
 def validate_entry(entry):
     return bool(entry.get('trainer')) and bool(entry.get('pokemon')) and (bool(entry.get('stats')) or (entry.get('moves') and len(entry['moves']) > 0))
 
-def safe_save(db, old_count):
-    if len(db) < old_count:
-        print("ABORT: new (" + str(len(db)) + ") < old (" + str(old_count) + ")")
-        restore_backup()
+def safe_save(index, failed=0, attempted=0, store=None):
+    db = index.db
+    if attempted and failed > MAX_FAILED_RATIO * attempted:
+        print("ABORT: " + str(failed) + " of " + str(attempted) + " pages failed")
         return False
+    if store is None:
+        store = DexStore()
     try:
-        with open(TEMP_FILE, 'w', encoding='utf-8') as f:
-            json.dump(db, f, ensure_ascii=False, indent=4)
-        with open(TEMP_FILE, 'r', encoding='utf-8') as f:
-            verify = json.load(f)
-        if not isinstance(verify, list) or len(verify) != len(db):
-            print("ABORT: verify failed")
-            restore_backup()
-            return False
-        shutil.move(TEMP_FILE, OUTPUT_FILE)
-        print("Saved: " + str(len(db)) + " pairs")
+        if not store.exists():
+            index.dirty.update(range(len(db)))
+        appended = store.commit(db, index.dirty)
+        if appended or not os.path.exists(OUTPUT_FILE):
+            export_legacy_json(db)
+        index.dirty.clear()
+        print("Saved: " + str(len(db)) + " pairs (" + str(appended) + " records written)")
         return True
     except Exception as e:
         print("ABORT: " + str(e))
-        restore_backup()
-        if os.path.exists(TEMP_FILE):
-            os.remove(TEMP_FILE)
+        if os.path.exists(OUTPUT_FILE + ".tmp"):
+            os.remove(OUTPUT_FILE + ".tmp")
         return False
 
+class RunJournal:
+    # Per-run checkpoint: a header line naming the list snapshot and run
+    # mode, then one fsync'd line per finished page with its entries. A
+    # rerun against the same snapshot and mode picks the pages up from here
+    # instead of fetching them again; a torn last line is ignored. Removed
+    # once the run's entries are saved.
+    def __init__(self, path=JOURNAL_FILE):
+        self.path = path
+        self.pages = {}
+        self.f = None
+
+    def open(self, list_hash, mode, resume=True):
+        header = {'list_hash': list_hash, 'mode': mode}
+        if resume and os.path.exists(self.path):
+            with open(self.path, 'rb') as f:
+                lines = f.read().split(b'\n')
+            try:
+                first = json.loads(lines[0])
+            except ValueError:
+                first = None
+            if first and {k: first.get(k) for k in header} == header:
+                valid = len(lines[0]) + 1
+                for line in lines[1:-1]:
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        break
+                    self.pages[rec['page']] = rec['entries']
+                    valid += len(line) + 1
+                self.f = open(self.path, 'ab')
+                self.f.truncate(valid)
+                return len(self.pages)
+        if os.path.exists(self.path) and os.path.getsize(self.path):
+            print("Journal: starting over, discarding " + self.path)
+        self.f = open(self.path, 'wb')
+        self._append(dict(header, started=datetime.now(timezone.utc).isoformat(timespec='seconds')))
+        return 0
+
+    def _append(self, obj):
+        self.f.write(json.dumps(obj, ensure_ascii=False).encode('utf-8') + b'\n')
+        self.f.flush()
+        os.fsync(self.f.fileno())
+
+    def record(self, page_url, entries):
+        self.pages[page_url] = entries
+        self._append({'page': page_url, 'entries': entries})
+
+    def close(self):
+        if self.f:
+            self.f.close()
+            self.f = None
+
+    def clear(self):
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
 
 # ================================================================
 # MAIN
 # ================================================================
-def run_scraper():
+def write_exports(store, sqlite_path=None, columns_dir=None, feed_dir=None, api_dir=None):
+    if not store.exists():
+        return
+    if sqlite_path:
+        with METRICS.timer('export.sqlite'):
+            written, removed = exports.export_sqlite(store, sqlite_path)
+        if written or removed:
+            print("SQLite: " + str(written) + " pairs written, " + str(removed) + " removed -> " + sqlite_path)
+    if columns_dir:
+        with METRICS.timer('export.columns'):
+            written = exports.export_columns(store, columns_dir)
+        if written:
+            print("Columns: " + str(written) + " pairs -> " + columns_dir)
+    if feed_dir:
+        with METRICS.timer('export.feed'):
+            published = exports.export_feed(store, feed_dir)
+        if published:
+            print("Feed: version %d (+%d added, %d changed, %d removed) -> %s" % (published + (feed_dir,)))
+    if api_dir:
+        with METRICS.timer('export.api'):
+            written, removed = exports.export_api(store, api_dir)
+        if written or removed:
+            print("API: " + str(written) + " shards written, " + str(removed) + " removed -> " + api_dir)
+
+def build_page_entries(select, results, revid=None):
+    # Entries for the page_selection's list pairs, plus the unmatched
+    # sections it wants as extras (sections left unparsed are never extras).
+    page_url, base_name = select['page'], select['base']
+    entries = []
+    matched_ids = set()
+    matcher = SectionMatcher([s for s in results if s.get('parsed', True)])
+    for pi in select['pairs']:
+        m, score, reason = matcher.match(pi)
+        METRICS.incr('match.matched' if m else 'match.no_match')
+        if m:
+            METRICS.incr('match.reason.' + reason)
+            METRICS.observe('match.score', score)
+            matched_ids.add(id(m))
+        role = pi['role']
+        if not role and m and m.get('info', {}).get('role'):
+            role = m['info']['role']
+        url_a = page_url + ("#" + pi['anchor'] if pi.get('anchor') else "")
+        entries.append({
+            "id": pair_id(pi['trainer_full'], pi['pokemon_clean']),
+            "trainer": pi['trainer_full'],
+            "trainer_variant": m['trainer_variant'] if m else "",
+            "trainer_sprite": m['trainer_sprite'] if m else "",
+            "pokemon": pi['pokemon_full'],
+            "pokemon_images": m['pokemon_images'] if m else [],
+            "type": pi['type'], "weakness": pi['weakness'],
+            "role": role, "rarity": pi['rarity'], "url": url_a,
+            "stats": m['stats'] if m else {},
+            "info": m['info'] if m else {},
+            "moves": m['moves'] if m else [],
+            "passive_skills": m['passive_skills'] if m else [],
+            "theme_skills": m['theme_skills'] if m else [],
+            "sync_grid": m['sync_grid'] if m else [],
+            "_status": "matched" if m else "no_match",
+            "_revid": revid
+        })
+        if m:
+            entries[-1]["_section_hash"] = m['section_hash']
+        print("   " + ("MATCH" if m else "NO MATCH") + ": " + pi['trainer_full'] + " & " + pi['pokemon_clean'])
+
+    for s in results:
+        if id(s) not in matched_ids and s.get('parsed', True) and wants_extra(select, s['pokemon_section']):
+            eid = pair_id(base_name, s['pokemon_section'])
+            METRICS.incr('match.extras')
+            entries.append({
+                "id": eid, "trainer": base_name, "trainer_variant": s['trainer_variant'],
+                "trainer_sprite": s['trainer_sprite'], "pokemon": s['pokemon_section'],
+                "pokemon_images": s['pokemon_images'],
+                "type": s['info'].get('move_type', ''), "weakness": s['info'].get('weakness', ''),
+                "role": s['info'].get('role', ''), "rarity": "", "url": page_url,
+                "stats": s['stats'], "info": s['info'], "moves": s['moves'],
+                "passive_skills": s['passive_skills'], "theme_skills": s['theme_skills'],
+                "sync_grid": s['sync_grid'], "_status": "extra_from_page",
+                "_revid": revid, "_section_hash": s['section_hash']
+            })
+    return entries
+
+def run_scraper(workers=DEFAULT_WORKERS, serial=False, host_delay=HOST_DELAY, use_cache=True,
+                cache_dir=CACHE_DIR, check_revisions=False, api_url=None, list_xpath=False,
+                parse_workers=PARSE_WORKERS, refresh=False, sqlite_path=exports.SQLITE_FILE,
+                columns_dir=exports.COLUMNS_DIR, feed_dir=exports.FEED_DIR, api_dir=exports.API_DIR,
+                archive=None, resume=True, journal_path=JOURNAL_FILE, adaptive=True, extras=True,
+                section_cache=SECTION_CACHE_DIR):
     print("=" * 60)
     print("MASTERS DEX AUTO-UPDATER")
     print(datetime.utcnow().strftime('%Y-%m-%d %H:%M UTC'))
     print("=" * 60)
 
-    db = load_existing_db()
-    old_count = len(db)
-    if old_count > 0:
-        create_backup()
-    existing_keys = get_existing_keys(db)
+    store = DexStore()
+    dex = load_index(store)
+    db = dex.db
+    old_count = len(dex)
+    cache = None
+    if use_cache:
+        cache = HttpCache(cache_dir)
+        removed = cache.evict()
+        if removed:
+            print("Cache: evicted " + str(removed) + " entries")
+    client = set_client(HttpClient(pool_size=workers, cache=cache, archive=archive))
 
     try:
-        trainer_pages, all_pairs = get_sync_pair_list()
+        print("1. Loading sync pair list...")
+        with METRICS.timer('stage.list_fetch'):
+            list_res = client.get(LIST_URL)
+        list_hash = getattr(list_res, 'body_hash', None)
+        if (not check_revisions and not refresh and cache and list_hash
+                and cache.is_processed(LIST_URL, list_hash, old_count)):
+            print("   List unchanged since last complete run")
+            print("\nNO NEW PAIRS. Up to date: " + str(old_count))
+            write_exports(store, sqlite_path, columns_dir, feed_dir, api_dir)
+            return
+        with METRICS.timer('stage.list_parse'):
+            trainer_pages, all_pairs = parse_sync_pair_list(list_res.text, xpath=list_xpath)
     except Exception as e:
         print("ABORT: " + str(e))
         return
@@ -701,13 +1893,32 @@ def run_scraper():
         print("ABORT: no data from Bulbapedia")
         return
 
-    new_pairs = [p for p in all_pairs if p['trainer_full'] + "|" + p['pokemon_clean'] not in existing_keys]
+    changed_pages = []
+    revisions = {}
+    if refresh:
+        changed_pages = list(trainer_pages) + [u for u in dex.by_page if u and u not in trainer_pages]
+        print("2. Refreshing all " + str(len(changed_pages)) + " trainer pages")
+    elif check_revisions:
+        print("2. Checking page revisions...")
+        try:
+            with METRICS.timer('stage.revisions'):
+                changed_pages, revisions = find_changed_pages(db, client, api_url)
+        except Exception as e:
+            print("ABORT: " + str(e))
+            return
+        print("   " + str(len(revisions)) + " pages checked, " + str(len(changed_pages)) + " changed")
 
-    if not new_pairs:
+    new_pairs = [p for p in all_pairs if pair_id(p['trainer_full'], p['pokemon_clean']) not in dex]
+
+    if not new_pairs and not changed_pages:
+        if cache and list_hash:
+            cache.mark_processed(LIST_URL, list_hash, old_count)
         print("\nNO NEW PAIRS. Up to date: " + str(old_count))
+        write_exports(store, sqlite_path, columns_dir, feed_dir, api_dir)
         return
 
-    print("\nFOUND " + str(len(new_pairs)) + " NEW:")
+    if new_pairs:
+        print("\nFOUND " + str(len(new_pairs)) + " NEW:")
     for p in new_pairs:
         print("   " + p['trainer_full'] + " & " + p['pokemon_clean'])
 
@@ -715,75 +1926,262 @@ def run_scraper():
     for p in new_pairs:
         if p['page_url'] not in pages:
             pages[p['page_url']] = trainer_pages.get(p['page_url'], '')
+    for url in changed_pages:
+        if url not in pages:
+            pages[url] = trainer_pages.get(url) or page_title(url).replace(' (Masters)', '')
+    changed = set(changed_pages)
+    known_sections = {}
+    for entry in db:
+        url = entry_page(entry)
+        if url in changed and entry.get('_section_hash'):
+            known_sections.setdefault(url, {})[entry['_section_hash']] = {k: entry[k] for k in SECTION_FIELDS}
 
-    new_entries = []
-    for page_url, base_name in pages.items():
-        pp = [p for p in new_pairs if p['page_url'] == page_url]
-        print("\n" + base_name)
-        try:
-            results = scrape_trainer_page(page_url)
-        except Exception as e:
-            print("   ERROR: " + str(e))
+    if section_cache and SectionCache(section_cache).purge_stale():
+        print("Section cache: dropped entries from older parser versions")
+    journal = RunJournal(journal_path)
+    mode = 'refresh' if refresh else 'revisions' if check_revisions else 'new'
+    resumed = journal.open(list_hash or hashlib.sha256(list_res.content).hexdigest(), mode, resume)
+    if resumed:
+        print("\nResuming: " + str(resumed) + " pages already done in " + journal_path)
+    todo = [u for u in pages if u not in journal.pages]
+    selections = {}
+    for url in todo:
+        pp = [p for p in (all_pairs if url in changed else new_pairs) if p['page_url'] == url]
+        selections[url] = page_selection(url, pages[url], pp, dex, url in changed, extras)
+    if serial or not adaptive:
+        throttle = HostThrottle(host_delay, 1 if serial else HOST_MAX_IN_FLIGHT)
+    else:
+        throttle = client.observer = AdaptiveThrottle(host_delay, HOST_MAX_IN_FLIGHT, max_limit=workers)
+    if serial or len(todo) < 2:
+        parse_workers = 0
+    fetched = iter_trainer_pages(todo, workers, serial, throttle, client)
+    failed_pages = 0
+    pages_start = time.perf_counter()
+    for page_url, html, results, log in iter_parsed_pages(fetched, parse_workers, known_sections, selections,
+                                                         section_cache):
+        base_name = pages[page_url]
+        if page_url in changed:
+            print("\n" + base_name + (" (refresh)" if refresh else " (revised)"))
+        else:
+            print("\n" + base_name)
+        if html is None:
+            failed_pages += 1
             continue
+        print(log, end='')
         if not results:
+            failed_pages += 1
             continue
+        revid = extract_revision_id(html) or revisions.get(page_url)
+        journal.record(page_url, build_page_entries(selections[page_url], results, revid))
 
-        matched_ids = set()
-        for pi in pp:
-            m = match_pair_to_section(pi, results)
-            if m:
-                matched_ids.add(id(m))
-            role = pi['role']
-            if not role and m and m.get('info', {}).get('role'):
-                role = m['info']['role']
-            url_a = page_url + ("#" + pi['anchor'] if pi.get('anchor') else "")
-            new_entries.append({
-                "trainer": pi['trainer_full'],
-                "trainer_variant": m['trainer_variant'] if m else "",
-                "trainer_sprite": m['trainer_sprite'] if m else "",
-                "pokemon": pi['pokemon_full'],
-                "pokemon_images": m['pokemon_images'] if m else [],
-                "type": pi['type'], "weakness": pi['weakness'],
-                "role": role, "rarity": pi['rarity'], "url": url_a,
-                "stats": m['stats'] if m else {},
-                "info": m['info'] if m else {},
-                "moves": m['moves'] if m else [],
-                "passive_skills": m['passive_skills'] if m else [],
-                "theme_skills": m['theme_skills'] if m else [],
-                "sync_grid": m['sync_grid'] if m else [],
-                "_status": "matched" if m else "no_match"
-            })
-            print("   " + ("MATCH" if m else "NO MATCH") + ": " + pi['trainer_full'] + " & " + pi['pokemon_clean'])
-
-        for s in results:
-            if id(s) not in matched_ids:
-                ek = base_name + "|" + re.sub(r'[\u2642\u2640]', '', s['pokemon_section'].split('\u2192')[-1].strip()).strip()
-                if ek not in existing_keys:
-                    new_entries.append({
-                        "trainer": base_name, "trainer_variant": s['trainer_variant'],
-                        "trainer_sprite": s['trainer_sprite'], "pokemon": s['pokemon_section'],
-                        "pokemon_images": s['pokemon_images'],
-                        "type": s['info'].get('move_type', ''), "weakness": s['info'].get('weakness', ''),
-                        "role": s['info'].get('role', ''), "rarity": "", "url": page_url,
-                        "stats": s['stats'], "info": s['info'], "moves": s['moves'],
-                        "passive_skills": s['passive_skills'], "theme_skills": s['theme_skills'],
-                        "sync_grid": s['sync_grid'], "_status": "extra_from_page"
-                    })
-        time.sleep(0.5)
-
+    METRICS.add_time('stage.pages', time.perf_counter() - pages_start)
+    METRICS.incr('pages.failed', failed_pages)
+    METRICS.incr('pages.resumed', resumed)
+    print("\n" + client.summary())
+    if section_cache:
+        counts = METRICS.snapshot()['counters']
+        print("Section cache: " + str(counts.get('parse.cache_hits', 0)) + " hits, "
+              + str(counts.get('parse.cache_misses', 0)) + " misses")
+    journal.close()
+    new_entries = [e for url in pages for e in journal.pages.get(url, [])]
     if not new_entries:
         print("\nNo valid entries scraped.")
         return
 
-    db.extend(new_entries)
-    ok = safe_save(db, old_count)
+    counts = {'added': 0, 'updated': 0, 'unchanged': 0}
+    for entry in new_entries:
+        counts[dex.upsert(entry)] += 1
+    for k, n in counts.items():
+        METRICS.incr('entries.' + k, n)
+    with METRICS.timer('stage.save'):
+        ok = safe_save(dex, failed_pages, len(todo), store)
+    if ok:
+        journal.clear()
+        write_exports(store, sqlite_path, columns_dir, feed_dir, api_dir)
+    if ok and cache and list_hash and not failed_pages:
+        cache.mark_processed(LIST_URL, list_hash, len(dex))
 
     print("\n" + "=" * 60)
     if ok:
-        print("SUCCESS: +" + str(len(new_entries)) + " = " + str(len(db)) + " total")
+        print("SUCCESS: +" + str(counts['added']) + " new, " + str(counts['updated']) + " updated, "
+              + str(counts['unchanged']) + " unchanged = " + str(len(db)) + " total")
     else:
         print("FAILED - data unchanged")
     print("=" * 60)
 
+def mirror_store_assets(root, workers=DEFAULT_WORKERS, host_delay=HOST_DELAY, sizes=(),
+                        revalidate=False, origin=None):
+    store = DexStore()
+    if not store.exists():
+        print("Assets: no database yet")
+        return
+    print("Mirroring images...")
+    client = get_client()
+    throttle = HostThrottle(host_delay)
+    assets.mirror_assets(store.iter_entries(), client, throttle, root=root, workers=max(1, workers),
+                         revalidate=revalidate, sizes=sizes, origin=origin)
+
+def parity_view(pairs, results):
+    # Section hashes cover the backend name, so they are left out.
+    sections = [{k: v for k, v in s.items() if k != 'section_hash'} for s in results or []]
+    return json.dumps([pairs, sections], ensure_ascii=False)
+
+def check_parser_parity(paths):
+    # Parses each saved page with every installed backend (plus the lxml
+    # XPath list path and a full, unsliced parse) and checks the JSON
+    # output is byte-identical.
+    backends = [b for b in HTML_PARSERS if parser_available(b)]
+    ok = True
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            html = f.read()
+        outputs = {}
+        with redirect_stdout(io.StringIO()):
+            for backend in backends:
+                outputs[backend] = parity_view(parse_sync_pair_list(html, parser=backend),
+                                               parse_trainer_page(html, parser=backend))
+            if lxml_html is not None:
+                outputs['lxml-xpath'] = parity_view(parse_sync_pair_list(html, xpath=True),
+                                                    parse_trainer_page(html, parser='html.parser'))
+            outputs['full-parse'] = parity_view(parse_sync_pair_list(html, parser='html.parser', partial=False),
+                                                parse_trainer_page(html, parser='html.parser', partial=False))
+        ref = outputs['html.parser']
+        bad = [b for b, out in outputs.items() if out != ref]
+        if bad:
+            ok = False
+            print("MISMATCH " + path + ": " + ", ".join(bad) + " differ from html.parser")
+        else:
+            print("OK " + path + " (" + ", ".join(outputs) + ")")
+    return ok
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Masters Dex auto-updater")
+    ap.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                    help="concurrent trainer-page downloads (default: %(default)s)")
+    ap.add_argument('--serial', action='store_true',
+                    help="fetch and parse one page at a time")
+    ap.add_argument('--parse-workers', type=int, default=PARSE_WORKERS,
+                    help="processes for page parsing, 0 parses in-process (default: %(default)s)")
+    ap.add_argument('--host-delay', type=float, default=HOST_DELAY,
+                    help="seconds between requests to one host, the starting point when adapting (default: %(default)s)")
+    ap.add_argument('--fixed-rate', action='store_true',
+                    help="keep in-flight requests and host delay fixed instead of adapting them")
+    ap.add_argument('--no-cache', action='store_true',
+                    help="bypass the on-disk HTTP cache")
+    ap.add_argument('--cache-dir', default=CACHE_DIR,
+                    help="HTTP cache directory (default: %(default)s)")
+    ap.add_argument('--section-cache', default=SECTION_CACHE_DIR,
+                    help="parsed-section cache directory (default: %(default)s)")
+    ap.add_argument('--no-section-cache', action='store_true',
+                    help="re-parse every section instead of using the parsed-section cache")
+    ap.add_argument('--check-revisions', action='store_true',
+                    help="re-scrape existing pages whose wiki revision ID changed")
+    ap.add_argument('--refresh', action='store_true',
+                    help="re-scrape every trainer page and update entries whose data changed")
+    ap.add_argument('--no-extras', action='store_true',
+                    help="only parse the page sections of list pairs, skip unlisted sections")
+    ap.add_argument('--sqlite', default=exports.SQLITE_FILE, metavar='PATH',
+                    help="SQLite export path (default: %(default)s)")
+    ap.add_argument('--no-sqlite', action='store_true',
+                    help="skip the SQLite export")
+    ap.add_argument('--columns', default=exports.COLUMNS_DIR, metavar='DIR',
+                    help="columnar (.npy) export directory (default: %(default)s)")
+    ap.add_argument('--no-columns', action='store_true',
+                    help="skip the columnar export")
+    ap.add_argument('--assets', nargs='?', const=assets.ASSETS_DIR, default=None, metavar='DIR',
+                    help="mirror trainer/pokemon images into DIR (default: " + assets.ASSETS_DIR + ")")
+    ap.add_argument('--asset-sizes', default='', metavar='PX,PX',
+                    help="also write downscaled copies at these sizes (needs Pillow)")
+    ap.add_argument('--asset-revalidate', action='store_true',
+                    help="re-request already mirrored images with conditional requests")
+    ap.add_argument('--asset-origin', default=None, metavar='URL',
+                    help="fetch images from this origin instead of their own host (e.g. a local stand-in)")
+    ap.add_argument('--api-url', default=None,
+                    help="MediaWiki API endpoint (default: " + API_URL + ")")
+    ap.add_argument('--parser', choices=HTML_PARSERS, default=HTML_PARSER,
+                    help="BeautifulSoup backend (default: %(default)s)")
+    ap.add_argument('--list-xpath', action='store_true',
+                    help="read the sync pair list table with lxml XPath instead of BeautifulSoup")
+    ap.add_argument('--full-parse', action='store_true',
+                    help="parse whole pages instead of only the content region")
+    ap.add_argument('--feed', default=exports.FEED_DIR, metavar='DIR',
+                    help="delta feed directory (default: %(default)s)")
+    ap.add_argument('--no-feed', action='store_true',
+                    help="skip the delta feed")
+    ap.add_argument('--api', default=exports.API_DIR, metavar='DIR',
+                    help="sharded static API directory (default: %(default)s)")
+    ap.add_argument('--no-api', action='store_true',
+                    help="skip the static API export")
+    journal_opts = ap.add_mutually_exclusive_group()
+    journal_opts.add_argument('--resume', dest='resume', action='store_true', default=True,
+                              help="continue an interrupted run from its journal (default)")
+    journal_opts.add_argument('--clean', dest='resume', action='store_false',
+                              help="discard any run journal and start over")
+    ap.add_argument('--journal', default=JOURNAL_FILE, metavar='PATH',
+                    help="run journal path (default: %(default)s)")
+    archive_opts = ap.add_mutually_exclusive_group()
+    archive_opts.add_argument('--record', metavar='ARCHIVE',
+                              help="append every fetched response to this archive (.jsonl.gz)")
+    archive_opts.add_argument('--replay', metavar='ARCHIVE',
+                              help="answer all requests from a recorded archive instead of the network")
+    ap.add_argument('--replay-dir', default=REPLAY_DIR, metavar='DIR',
+                    help="with --replay, run on a copy of the DB and write every output here (default: %(default)s)")
+    ap.add_argument('--replay-in-place', action='store_true',
+                    help="with --replay, update the real DB and published outputs instead")
+    ap.add_argument('--report', default=metrics.REPORT_FILE, metavar='PATH',
+                    help="JSON run report with per-stage timings and counters (default: %(default)s)")
+    ap.add_argument('--no-report', action='store_true',
+                    help="skip the run report")
+    ap.add_argument('--profile', choices=metrics.PROFILERS, default=None,
+                    help="profile the run (parsing is only covered with --parse-workers 0)")
+    ap.add_argument('--profile-out', default=None, metavar='PATH',
+                    help="profile output (default: masters_dex_profile.prof / .html)")
+    ap.add_argument('--parity', nargs='+', metavar='HTML',
+                    help="check that all parser backends give identical output for saved pages, then exit")
+    args = ap.parse_args(argv)
+    if args.parity:
+        sys.exit(0 if check_parser_parity(args.parity) else 1)
+    set_html_parser(args.parser)
+    set_partial_parse(not args.full_parse)
+    archive = None
+    if args.record:
+        archive = HttpArchive(args.record)
+    elif args.replay:
+        archive = HttpArchive(args.replay, replay=True)
+        args.no_cache = True
+        args.host_delay = 0
+        if not args.replay_in_place:
+            enter_replay_dir(args.replay_dir)
+    started = datetime.now(timezone.utc)
+    start = time.perf_counter()
+    profiler = metrics.start_profiler(args.profile)
+    try:
+        run_scraper(workers=args.workers, serial=args.serial, host_delay=args.host_delay,
+                    use_cache=not args.no_cache, cache_dir=args.cache_dir,
+                    check_revisions=args.check_revisions, api_url=args.api_url,
+                    list_xpath=args.list_xpath, parse_workers=args.parse_workers,
+                    refresh=args.refresh, sqlite_path=None if args.no_sqlite else args.sqlite,
+                    columns_dir=None if args.no_columns else args.columns,
+                    feed_dir=None if args.no_feed else args.feed,
+                    api_dir=None if args.no_api else args.api, archive=archive,
+                    resume=args.resume, journal_path=args.journal, adaptive=not args.fixed_rate,
+                    extras=not args.no_extras,
+                    section_cache=None if args.no_section_cache else args.section_cache)
+        if args.assets:
+            sizes = [int(px) for px in args.asset_sizes.split(',') if px.strip()]
+            with METRICS.timer('stage.assets'):
+                mirror_store_assets(args.assets, workers=args.workers, host_delay=args.host_delay, sizes=sizes,
+                                    revalidate=args.asset_revalidate, origin=args.asset_origin)
+    finally:
+        metrics.stop_profiler(profiler, args.profile, args.profile_out)
+        if not args.no_report:
+            metrics.write_report(args.report, {
+                'started': started.isoformat(timespec='seconds'),
+                'seconds': round(time.perf_counter() - start, 3),
+                'argv': sys.argv[1:] if argv is None else list(argv),
+                'parser': HTML_PARSER, 'partial_parse': PARTIAL_PARSE,
+                'http': dict(_client.stats) if _client else None,
+            })
+
 if __name__ == "__main__":
-    run_scraper()
+    main()
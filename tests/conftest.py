@@ -0,0 +1,63 @@
+import os
+import sys
+import threading
+import time
+from urllib.parse import unquote
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+PAGE_DELAYS = {}  # title -> seconds the wiki stand-in waits before answering
+
+@pytest.fixture
+def stand_in():
+    # Local HTTP stand-in: start(handler) serves handler(path, headers) ->
+    # (status, headers, body) on a free port and returns the base URL.
+    servers = []
+
+    def start(handler):
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                status, headers, body = handler(self.path, self.headers)
+                self.send_response(status)
+                for k, v in headers.items():
+                    self.send_header(k, v)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+        server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return 'http://127.0.0.1:' + str(server.server_port)
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+@pytest.fixture
+def wiki(stand_in, monkeypatch):
+    # Stand-in wiki serving tests/fixtures/<title>.html at /wiki/<title>
+    # (404 otherwise), with the scraper's list and page URLs pointed at it.
+    # Returns the list of requested paths.
+    import scraper
+    hits = []
+
+    def handler(path, headers):
+        hits.append(path)
+        title = unquote(path.split('?')[0][len('/wiki/'):])
+        time.sleep(PAGE_DELAYS.get(title, 0))
+        page = os.path.join(FIXTURES, title + '.html')
+        if path.startswith('/wiki/') and '/' not in title and os.path.exists(page):
+            with open(page, 'rb') as f:
+                return 200, {'Content-Type': 'text/html; charset=UTF-8'}, f.read()
+        return 404, {}, b''
+    base = stand_in(handler)
+    monkeypatch.setattr(scraper, 'BASE_URL', base)
+    monkeypatch.setattr(scraper, 'LIST_URL', base + '/wiki/List_of_sync_pairs')
+    return hits
@@ -0,0 +1,106 @@
+import hashlib
+import json
+import os
+import struct
+import zlib
+
+import pytest
+
+import assets
+import scraper
+
+def png(width, height):
+    # Minimal grey RGB PNG.
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+    rows = b''.join(b'\0' + b'\x80' * (3 * width) for _ in range(height))
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(rows)) + chunk(b'IEND', b''))
+
+PNG = png(128, 96)
+
+def image_server(stand_in, requests_seen):
+    # Two URLs with the same bytes, one with different bytes; ETags honored.
+    files = {'/a.png': PNG, '/same-as-a.png': PNG, '/b.png': PNG + b'\0'}
+
+    def handler(path, headers):
+        requests_seen.append((path, headers.get('If-None-Match')))
+        body = files.get(path)
+        if body is None:
+            return 404, {}, b''
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        if headers.get('If-None-Match') == etag:
+            return 304, {'ETag': etag}, b''
+        return 200, {'ETag': etag, 'Content-Type': 'image/png'}, body
+    return stand_in(handler)
+
+def entries_for(base):
+    return [
+        {'trainer_sprite': base + '/a.png', 'pokemon_images': [base + '/same-as-a.png']},
+        {'trainer_sprite': base + '/b.png', 'pokemon_images': [base + '/a.png', base + '/missing.png']},
+    ]
+
+def test_mirror_is_content_addressed(stand_in, tmp_path):
+    seen = []
+    base = image_server(stand_in, seen)
+    root = str(tmp_path / 'assets')
+    counts = assets.mirror_assets(entries_for(base), scraper.HttpClient(retries=0), root=root, workers=2)
+    assert counts == {'new': 3, 'not_modified': 0, 'failed': 1, 'skipped': 0}
+    with open(os.path.join(root, 'manifest.json'), encoding='utf-8') as f:
+        urls = json.load(f)['urls']
+    assert urls[base + '/a.png']['path'] == urls[base + '/same-as-a.png']['path']
+    assert urls[base + '/a.png']['sha256'] == hashlib.sha256(PNG).hexdigest()
+    with open(os.path.join(root, urls[base + '/b.png']['path']), 'rb') as f:
+        assert f.read() == PNG + b'\0'
+
+def test_mirror_skips_and_revalidates(stand_in, tmp_path):
+    seen = []
+    base = image_server(stand_in, seen)
+    root = str(tmp_path / 'assets')
+    client = scraper.HttpClient(retries=0)
+    assets.mirror_assets(entries_for(base), client, root=root)
+    del seen[:]
+    counts = assets.mirror_assets(entries_for(base), client, root=root)
+    assert counts['skipped'] == 3 and counts['new'] == 0
+    assert [p for p, _ in seen] == ['/missing.png']
+    counts = assets.mirror_assets(entries_for(base), client, root=root, revalidate=True)
+    assert counts['not_modified'] == 3
+    assert all(etag for p, etag in seen if p != '/missing.png')
+
+def test_mirror_with_origin_keeps_original_urls(stand_in, tmp_path):
+    seen = []
+    base = image_server(stand_in, seen)
+    root = str(tmp_path / 'assets')
+    entries = [{'trainer_sprite': 'https://archives.test/a.png', 'pokemon_images': []}]
+    counts = assets.mirror_assets(entries, scraper.HttpClient(retries=0), root=root, origin=base)
+    assert counts['new'] == 1
+    assert assets.load_manifest(root)['https://archives.test/a.png']['bytes'] == len(PNG)
+
+@pytest.mark.skipif(assets.Image is None, reason="needs Pillow")
+def test_mirror_writes_derivatives(stand_in, tmp_path):
+    seen = []
+    base = image_server(stand_in, seen)
+    root = str(tmp_path / 'assets')
+    entries = [{'trainer_sprite': base + '/a.png', 'pokemon_images': []}]
+    assets.mirror_assets(entries, scraper.HttpClient(retries=0), root=root, sizes=(64,))
+    rec = assets.load_manifest(root)[base + '/a.png']
+    assert os.path.exists(os.path.join(root, rec['sizes']['64']))
+
+def test_lost_object_with_failed_refetch_is_dropped(stand_in, tmp_path):
+    up = {'ok': True}
+
+    def handler(path, headers):
+        if not up['ok']:
+            return 500, {}, b''
+        return 200, {'Content-Type': 'image/png'}, PNG
+    base = stand_in(handler)
+    root = str(tmp_path / 'assets')
+    entries = [{'trainer_sprite': base + '/a.png', 'pokemon_images': []}]
+    client = scraper.HttpClient(retries=0)
+    assets.mirror_assets(entries, client, root=root)
+    rec = assets.load_manifest(root)[base + '/a.png']
+    os.remove(os.path.join(root, rec['path']))
+    up['ok'] = False
+    counts = assets.mirror_assets(entries, client, root=root, sizes=(32,))
+    assert counts['failed'] == 1
+    assert base + '/a.png' not in assets.load_manifest(root)
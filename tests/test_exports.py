@@ -0,0 +1,182 @@
+import json
+import os
+import sqlite3
+
+import pytest
+
+import exports
+import masters_dex
+from dexcore import DexStore
+
+def entry(eid, attack, section_hash='a'):
+    return {'id': eid, 'trainer': eid.split('--')[0].title(), 'pokemon': eid.split('--')[1].title(),
+            'type': 'Fire', 'role': 'Strike', 'stats': {'Attack': attack}, '_section_hash': section_hash}
+
+def store_with(tmp_path, db):
+    store = DexStore(str(tmp_path / 'store'))
+    store.commit(db, set(range(len(db))))
+    return store
+
+def test_api_uses_first_record_and_public_fields(tmp_path):
+    db = [entry('red--pikachu', 300), entry('rosa--snivy', 250), entry('red--pikachu', 999)]
+    root = str(tmp_path / 'api')
+    exports.export_api(store_with(tmp_path, db), root)
+    with open(os.path.join(root, 'pairs', 'red--pikachu.json'), encoding='utf-8') as f:
+        shard = json.load(f)
+    assert shard['stats']['Attack'] == 300
+    assert not [k for k in shard if k.startswith('_')]
+
+def test_api_ignores_bookkeeping_changes(tmp_path):
+    root = str(tmp_path / 'api')
+    db = [entry('red--pikachu', 300), entry('rosa--snivy', 250)]
+    exports.export_api(store_with(tmp_path, db), root)
+    db = [entry('red--pikachu', 300, 'b'), entry('rosa--snivy', 250, 'b')]
+    store = DexStore(str(tmp_path / 'store'))
+    store.commit(db, {0, 1})
+    assert exports.export_api(store, root) == (0, 0)
+
+def test_api_restores_missing_siblings(tmp_path):
+    root = str(tmp_path / 'api')
+    store = store_with(tmp_path, [entry('red--pikachu', 300)])
+    exports.export_api(store, root)
+    path = os.path.join(root, 'pairs', 'red--pikachu.json')
+    os.remove(path + '.gz')
+    assert exports.export_api(store, root) == (0, 0)
+    assert os.path.exists(path + '.gz')
+    with open(os.path.join(root, 'manifest.json'), encoding='utf-8') as f:
+        assert json.load(f)['files']['pairs/red--pikachu.json']['gz'] == os.path.getsize(path + '.gz')
+
+def test_columns_widen_large_values(tmp_path):
+    db = [entry('red--pikachu', '40,000'), entry('rosa--snivy', 250)]
+    db[0]['moves'] = [{'name': 'Thunderbolt', 'base_power': '70000'}]
+    root = str(tmp_path / 'columns')
+    assert exports.export_columns(store_with(tmp_path, db), root) == 2
+    cols = masters_dex.load_columns(root)
+    assert cols['manifest']['columns']['stats']['dtype'] == '<i4'
+    assert cols['manifest']['columns']['move_base_power']['dtype'] == '<i4'
+    assert cols['manifest']['columns']['move_gauge']['dtype'] == '<i2'
+    assert masters_dex.top_n(cols, 'Attack', 1) == [('red--pikachu', 40000)]
+
+def test_columns_reject_values_beyond_int32(tmp_path):
+    db = [entry('red--pikachu', str(2 ** 40))]
+    with pytest.raises(ValueError, match='stats'):
+        exports.export_columns(store_with(tmp_path, db), str(tmp_path / 'columns'))
+
+def read_json(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def test_feed_versions_and_public_deltas(tmp_path):
+    root = str(tmp_path / 'feed')
+    store = store_with(tmp_path, [entry('red--pikachu', 300)])
+    assert exports.export_feed(store, root) == (1, 1, 0, 0)
+    assert exports.export_feed(store, root) is None
+    store.commit([entry('red--pikachu', 300, 'b')], {0})
+    assert exports.export_feed(store, root) is None
+    store.commit([entry('red--pikachu', 310, 'b'), entry('rosa--snivy', 250)], {0, 1})
+    assert exports.export_feed(store, root) == (2, 1, 1, 0)
+    delta = read_json(os.path.join(root, 'deltas', '2.json'))
+    assert delta['from'] == 1
+    for e in delta['added'] + delta['changed']:
+        assert not [k for k in e if k.startswith('_')]
+    store.commit([entry('rosa--snivy', 250)], {0})
+    assert exports.export_feed(store, root) == (3, 0, 0, 1)
+    manifest = read_json(os.path.join(root, 'manifest.json'))
+    assert [d['version'] for d in manifest['deltas']] == [1, 2, 3]
+    assert manifest['count'] == 1
+
+def test_feed_publishes_delta_left_by_a_crash(tmp_path, monkeypatch):
+    root = str(tmp_path / 'feed')
+    store = store_with(tmp_path, [entry('red--pikachu', 300)])
+    exports.export_feed(store, root)
+    store.commit([entry('red--pikachu', 310)], {0})
+
+    def crash(*args):
+        raise OSError("crash")
+    monkeypatch.setattr(exports, 'publish_delta', crash)
+    with pytest.raises(OSError):
+        exports.export_feed(store, root)
+    monkeypatch.undo()
+    assert read_json(os.path.join(root, 'state.json'))['version'] == 2
+    assert read_json(os.path.join(root, 'manifest.json'))['version'] == 1
+    assert exports.export_feed(store, root) is None
+    manifest = read_json(os.path.join(root, 'manifest.json'))
+    assert manifest['version'] == 2 and [d['version'] for d in manifest['deltas']] == [1, 2]
+
+def test_feed_rejects_state_far_from_manifest(tmp_path):
+    root = str(tmp_path / 'feed')
+    store = store_with(tmp_path, [entry('red--pikachu', 300)])
+    exports.export_feed(store, root)
+    exports.write_json(os.path.join(root, 'state.json'), {'version': 5, 'records': {}})
+    with pytest.raises(ValueError, match='does not match'):
+        exports.export_feed(store, root)
+
+def test_feed_prunes_past_keep(tmp_path):
+    root = str(tmp_path / 'feed')
+    store = store_with(tmp_path, [entry('red--pikachu', 300)])
+    for attack in range(300, 305):
+        store.commit([entry('red--pikachu', attack)], {0})
+        exports.export_feed(store, root, keep=2)
+    manifest = read_json(os.path.join(root, 'manifest.json'))
+    assert manifest['version'] == 5 and manifest['oldest'] == 3
+    assert [d['version'] for d in manifest['deltas']] == [4, 5]
+    assert sorted(os.listdir(os.path.join(root, 'deltas'))) == ['4.json', '5.json']
+
+def pair(eid, attack, move):
+    e = entry(eid, attack)
+    e['moves'] = [{'move_type': 'Move', 'name': move, 'description': 'Hits with ' + move.lower() + '.'}]
+    return e
+
+def sqlite_rows(path, sql, args=()):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute(sql, args).fetchall()
+    finally:
+        conn.close()
+
+def test_sqlite_rewrites_only_changed_pairs(tmp_path):
+    path = str(tmp_path / 'dex.sqlite')
+    db = [pair('red--pikachu', 300, 'Thunderbolt'), pair('rosa--snivy', 250, 'Leaf Blade')]
+    store = store_with(tmp_path, db)
+    assert exports.export_sqlite(store, path) == (2, 0)
+    texts = "SELECT rowid FROM texts WHERE pair_id = ?"
+    snivy = sqlite_rows(path, texts, ('rosa--snivy',))
+    assert exports.export_sqlite(store, path) == (0, 0)
+    store.commit([pair('red--pikachu', 310, 'Thunder'), db[1]], {0})
+    assert exports.export_sqlite(store, path) == (1, 0)
+    assert sqlite_rows(path, texts, ('rosa--snivy',)) == snivy
+    assert sqlite_rows(path, "SELECT attack FROM stats WHERE pair_id = 'red--pikachu'") == [(310,)]
+    store.commit([db[1]], {0})
+    assert exports.export_sqlite(store, path) == (0, 1)
+    assert sqlite_rows(path, "SELECT id FROM pairs") == [('rosa--snivy',)]
+    assert sqlite_rows(path, texts, ('red--pikachu',)) == []
+
+def test_sqlite_full_text_search(tmp_path):
+    path = str(tmp_path / 'dex.sqlite')
+    store = store_with(tmp_path, [pair('red--pikachu', 300, 'Thunderbolt'), pair('rosa--snivy', 250, 'Leaf Blade')])
+    exports.export_sqlite(store, path)
+    if not sqlite_rows(path, "SELECT name FROM sqlite_master WHERE name = 'texts_fts'"):
+        pytest.skip("SQLite built without FTS5")
+    query = ("SELECT t.pair_id, t.name FROM texts_fts JOIN texts t ON t.rowid = texts_fts.rowid "
+             "WHERE texts_fts MATCH ?")
+    assert sqlite_rows(path, query, ('leaf',)) == [('rosa--snivy', 'Leaf Blade')]
+    store.commit([pair('red--pikachu', 300, 'Leaf Storm'), pair('rosa--snivy', 250, 'Vine Whip')], {0, 1})
+    exports.export_sqlite(store, path)
+    assert sqlite_rows(path, query, ('leaf',)) == [('red--pikachu', 'Leaf Storm')]
+    assert sqlite_rows(path, query, ('thunderbolt',)) == []
+
+def test_sqlite_rebuilds_on_schema_change(tmp_path):
+    path = str(tmp_path / 'dex.sqlite')
+    store = store_with(tmp_path, [pair('red--pikachu', 300, 'Thunderbolt')])
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+        conn.execute("INSERT INTO meta VALUES ('schema_version', '0')")
+        conn.execute("CREATE TABLE pairs (id TEXT PRIMARY KEY, record_sha TEXT)")
+        conn.execute("INSERT INTO pairs VALUES ('red--pikachu', ?)", (store.records()[0][3],))
+    conn.close()
+    assert exports.export_sqlite(store, path) == (1, 0)
+    assert sqlite_rows(path, "SELECT value FROM meta WHERE key = 'schema_version'") == [
+        (str(exports.SQLITE_SCHEMA_VERSION),)]
+    assert sqlite_rows(path, "SELECT trainer FROM pairs") == [('Red',)]
+    assert exports.export_sqlite(store, path) == (0, 0)
@@ -0,0 +1,117 @@
+import json
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+import scraper
+
+def fake_response(status=200, body=b'', headers=None):
+    res = requests.Response()
+    res.status_code = status
+    res._content = body
+    res.headers.update(headers or {})
+    res.encoding = 'utf-8'
+    return res
+
+class FakeSession:
+    # Hands out the queued responses in order and records the request headers.
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.sent = []
+
+    def get(self, url, headers=None, timeout=None):
+        self.sent.append(dict(headers or {}))
+        return self.responses.pop(0)
+
+def test_cache_round_trip(tmp_path):
+    cache = scraper.HttpCache(str(tmp_path))
+    url = 'https://wiki.test/wiki/Red_(Masters)'
+    cache.store(url, fake_response(body=b'<html>red</html>', headers={'ETag': '"v1"', 'Last-Modified': 'Mon, 01 Jan 2024 00:00:00 GMT'}))
+    meta, body = cache.load(url)
+    assert body == b'<html>red</html>'
+    assert cache.conditional_headers(meta) == {'If-None-Match': '"v1"',
+                                               'If-Modified-Since': 'Mon, 01 Jan 2024 00:00:00 GMT'}
+
+def test_cache_rejects_corrupt_body(tmp_path):
+    cache = scraper.HttpCache(str(tmp_path))
+    url = 'https://wiki.test/wiki/Red_(Masters)'
+    cache.store(url, fake_response(body=b'original'))
+    with open(cache._path(url, '.body'), 'wb') as f:
+        f.write(b'tampered')
+    assert cache.load(url) == (None, None)
+
+def test_cache_processed_marker_follows_body(tmp_path):
+    cache = scraper.HttpCache(str(tmp_path))
+    url = 'https://wiki.test/wiki/List_of_sync_pairs'
+    meta = cache.store(url, fake_response(body=b'list'))
+    cache.mark_processed(url, meta['sha256'], 10)
+    assert cache.is_processed(url, meta['sha256'], 10)
+    assert not cache.is_processed(url, meta['sha256'], 11)
+    meta = cache.store(url, fake_response(body=b'list v2'))
+    assert not cache.is_processed(url, meta['sha256'], 10)
+
+def test_cache_evicts_over_budget(tmp_path):
+    cache = scraper.HttpCache(str(tmp_path), max_bytes=10)
+    for i in range(3):
+        cache.store('https://wiki.test/' + str(i), fake_response(body=b'12345678'))
+    assert cache.evict() == 2
+
+def test_client_revalidates_from_cache(tmp_path):
+    cache = scraper.HttpCache(str(tmp_path))
+    client = scraper.HttpClient(cache=cache)
+    client.session = FakeSession([fake_response(200, b'page', {'ETag': '"a"'}), fake_response(304)])
+    url = 'https://wiki.test/wiki/Page'
+    assert client.get(url).content == b'page'
+    res = client.get(url)
+    assert res.status_code == 200 and res.content == b'page' and res.from_cache
+    assert client.session.sent[1]['If-None-Match'] == '"a"'
+    assert client.stats['not_modified'] == 1
+
+def test_client_retries_with_retry_after(monkeypatch):
+    delays = []
+    monkeypatch.setattr(scraper.time, 'sleep', delays.append)
+    client = scraper.HttpClient()
+    client.session = FakeSession([fake_response(503, headers={'Retry-After': '2'}), fake_response(200, b'ok')])
+    assert client.get('https://wiki.test/x').content == b'ok'
+    assert delays == [2.0]
+    assert client.stats['retries'] == 1
+
+def test_page_revisions_against_stand_in(stand_in, monkeypatch):
+    # MediaWiki revisions API stand-in: normalizes underscores and follows
+    # one redirect, like the real one.
+    revids = {'Red (Masters)': 101, 'Rosa (Masters)': 202, 'Brock (Masters)': 303}
+    batches = []
+
+    def api(path, headers):
+        q = parse_qs(urlparse(path).query)
+        titles = q['titles'][0].split('|')
+        batches.append(titles)
+        pages, normalized, redirects = [], [], []
+        for t in titles:
+            name = t.replace('_', ' ')
+            if name != t:
+                normalized.append({'from': t, 'to': name})
+            if name == 'Old Brock (Masters)':
+                redirects.append({'from': name, 'to': 'Brock (Masters)'})
+                name = 'Brock (Masters)'
+            if name in revids:
+                pages.append({'title': name, 'revisions': [{'revid': revids[name]}]})
+            else:
+                pages.append({'title': name, 'missing': True})
+        query = {'pages': pages, 'normalized': normalized, 'redirects': redirects}
+        return 200, {'Content-Type': 'application/json'}, json.dumps({'query': query}).encode()
+
+    api_url = stand_in(api) + '/w/api.php'
+    monkeypatch.setattr(scraper, 'API_BATCH', 2)
+    base = 'https://wiki.test/wiki/'
+    db = [
+        {'url': base + 'Red_(Masters)#Pikachu', '_revid': 101},
+        {'url': base + 'Rosa_(Masters)', '_revid': 200},
+        {'url': base + 'Old_Brock_(Masters)', '_revid': 300},
+        {'url': base + 'Gone_(Masters)', '_revid': 1},
+    ]
+    changed, current = scraper.find_changed_pages(db, scraper.HttpClient(), api_url)
+    assert len(batches) == 2
+    assert current == {base + 'Red_(Masters)': 101, base + 'Rosa_(Masters)': 202,
+                       base + 'Old_Brock_(Masters)': 303}
+    assert sorted(changed) == [base + 'Old_Brock_(Masters)', base + 'Rosa_(Masters)']
@@ -0,0 +1,73 @@
+import json
+
+import scraper
+from dexcore import DexStore, OUTPUT_FILE
+
+def entry(trainer, pokemon, attack, **extra):
+    e = {'trainer': trainer, 'pokemon': pokemon, 'url': 'https://wiki.test/wiki/' + trainer + '_(Masters)',
+         'stats': {'Attack': str(attack)}}
+    e.update(extra)
+    return e
+
+def test_index_streams_entries_from_store(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    db = [dict(entry('Red', 'Pikachu', 300), id='red--pikachu'), dict(entry('Rosa', 'Snivy', 250), id='rosa--snivy')]
+    store = DexStore()
+    store.commit(db, {0, 1})
+    streamed = []
+
+    def iter_entries(verify=True, records=None):
+        for e in DexStore.iter_entries(store, verify, records):
+            streamed.append(e)
+            yield e
+    monkeypatch.setattr(store, 'iter_entries', iter_entries)
+    dex = scraper.load_index(store)
+    assert dex.db == db and dex.db[0] is streamed[0]
+    assert 'rosa--snivy' in dex and not dex.dirty
+
+def test_index_falls_back_to_legacy_json(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    store = DexStore()
+    store.commit([dict(entry('Red', 'Pikachu', 300), id='red--pikachu')], {0})
+    with open(store.log_path, 'r+b') as f:
+        f.write(b'[')
+    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
+        json.dump([entry('Red', 'Pikachu', 310)], f)
+    dex = scraper.load_index(store)
+    assert dex.db[0]['id'] == 'red--pikachu' and dex.db[0]['stats']['Attack'] == '310'
+    assert dex.dirty == {0} and not store.exists()
+
+def test_upsert_replaces_existing_and_appends_new():
+    dex = scraper.DexIndex([dict(entry('Red', 'Pikachu', 300), id='red--pikachu', _revid=1)])
+    assert dex.upsert(dict(entry('Red', 'Pikachu', 300), id='red--pikachu', _revid=1)) == 'unchanged'
+    assert not dex.dirty
+    assert dex.upsert(dict(entry('Red', 'Pikachu', 300), id='red--pikachu', _revid=2)) == 'unchanged'
+    assert dex.db[0]['_revid'] == 2 and dex.dirty == {0}
+    assert dex.upsert(dict(entry('Red', 'Pikachu', 320), id='red--pikachu')) == 'updated'
+    assert len(dex.db) == 1 and dex.db[0]['stats']['Attack'] == '320'
+    assert dex.upsert(dict(entry('Rosa', 'Snivy', 250), id='rosa--snivy')) == 'added'
+    assert [e['id'] for e in dex.db] == ['red--pikachu', 'rosa--snivy']
+    assert dex.dirty == {0, 1} and len(dex) == 2
+
+def test_duplicate_ids_collapse_on_load(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    db = [entry('Red', 'Pikachu', 300), entry('Rosa', 'Snivy', 250), entry('Red', 'Pikachu', 999),
+          entry('Brock', 'Onix', 200)]
+    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
+        json.dump(db, f)
+    dex = scraper.load_index(DexStore())
+    assert [e['id'] for e in dex.db] == ['red--pikachu', 'rosa--snivy', 'brock--onix']
+    assert dex.duplicates == 1 and dex.db[0]['stats']['Attack'] == '300'
+    assert scraper.safe_save(dex, store=DexStore())
+    assert [e['id'] for e in DexStore().iter_entries()] == ['red--pikachu', 'rosa--snivy', 'brock--onix']
+    with open(OUTPUT_FILE, encoding='utf-8') as f:
+        assert len(json.load(f)) == 3
+
+def test_save_refuses_mostly_failed_runs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    dex = scraper.DexIndex([])
+    dex.upsert(dict(entry('Red', 'Pikachu', 300), id='red--pikachu'))
+    assert not scraper.safe_save(dex, failed=3, attempted=4, store=DexStore())
+    assert not DexStore().exists()
+    assert scraper.safe_save(dex, failed=2, attempted=4, store=DexStore())
+    assert len(DexStore()) == 1
@@ -0,0 +1,23 @@
+import scraper
+
+def test_journal_resumes_same_snapshot(tmp_path):
+    path = str(tmp_path / 'journal.jsonl')
+    j = scraper.RunJournal(path)
+    assert j.open('hash1', 'new') == 0
+    j.record('https://wiki.test/wiki/Red', [{'id': 'red--pikachu'}])
+    j.close()
+    with open(path, 'ab') as f:
+        f.write(b'{"page": "https://wiki.test/wiki/Ro')
+    j = scraper.RunJournal(path)
+    assert j.open('hash1', 'new') == 1
+    assert j.pages == {'https://wiki.test/wiki/Red': [{'id': 'red--pikachu'}]}
+    j.close()
+    assert scraper.RunJournal(path).open('hash2', 'new') == 0
+
+def test_empty_journal_starts_fresh(tmp_path, capsys):
+    path = tmp_path / 'journal.jsonl'
+    path.write_bytes(b'')
+    j = scraper.RunJournal(str(path))
+    assert j.open('hash1', 'new') == 0
+    j.close()
+    assert 'discarding' not in capsys.readouterr().out
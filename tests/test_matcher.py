@@ -0,0 +1,114 @@
+import glob
+import io
+import os
+import random
+import re
+from contextlib import redirect_stdout
+
+import pytest
+
+import scraper
+from conftest import FIXTURES
+
+def linear_match(pair_info, page_results):
+    # The matcher SectionMatcher replaced: a scan over every section per
+    # pair. Kept here as the reference the index-based matcher must agree with.
+    pokemon_clean = pair_info['pokemon_clean'].lower().strip()
+    anchor = pair_info.get('anchor', '').lower().replace('_', ' ')
+    best_match = None
+    best_score = 0
+    for section in page_results:
+        section_name = section['pokemon_section']
+        section_names = scraper.get_section_pokemon_names(section_name)
+        section_lower = section_name.lower().strip()
+        section_simple = re.sub(r'\s*\(.*?\)', '', section_lower).strip()
+        if anchor:
+            anchor_clean = anchor.replace('_', ' ').lower()
+            if anchor_clean == section_lower or anchor_clean == section_lower.replace(' ', '_'):
+                return section, 1000
+            for sn in section_names:
+                if anchor_clean == sn or anchor_clean == sn.replace(' ', '_'):
+                    return section, 1000
+            if section_simple in anchor_clean or anchor_clean in section_lower:
+                if 200 > best_score:
+                    best_match, best_score = section, 200
+            for sn in section_names:
+                if sn in anchor_clean or anchor_clean in sn:
+                    if 190 > best_score:
+                        best_match, best_score = section, 190
+        if pokemon_clean in section_names:
+            return section, 500
+        if pokemon_clean in section_lower:
+            score = len(pokemon_clean) * 10
+            if score > best_score:
+                best_match, best_score = section, score
+        for sn in section_names:
+            if sn and pokemon_clean in sn:
+                score = len(pokemon_clean) * 9
+                if score > best_score:
+                    best_match, best_score = section, score
+            if sn and sn in pokemon_clean:
+                score = len(sn) * 8
+                if score > best_score:
+                    best_match, best_score = section, score
+        if section_simple and section_simple in pokemon_clean:
+            score = len(section_simple) * 8
+            if score > best_score:
+                best_match, best_score = section, score
+        pokemon_base = re.sub(r'\s*(gigantamax|mega)\s*.*$', '', pokemon_clean, flags=re.I).strip()
+        if pokemon_base:
+            if pokemon_base in section_names and 95 > best_score:
+                best_match, best_score = section, 95
+            if pokemon_base == section_simple and 90 > best_score:
+                best_match, best_score = section, 90
+    return best_match, best_score
+
+def assert_same(pairs, sections):
+    matcher = scraper.SectionMatcher(sections)
+    for pair in pairs:
+        section, score, _ = matcher.match(pair)
+        ref_section, ref_score = linear_match(pair, sections)
+        assert (section is ref_section, score) == (True, ref_score), (pair, [s['pokemon_section'] for s in sections])
+
+def test_matches_linear_scan_on_fixtures():
+    with redirect_stdout(io.StringIO()):
+        with open(os.path.join(FIXTURES, 'List_of_sync_pairs.html'), encoding='utf-8') as f:
+            _, pairs = scraper.parse_sync_pair_list(f.read(), parser='html.parser')
+        pages = []
+        for path in sorted(glob.glob(os.path.join(FIXTURES, '*_(Masters).html'))):
+            with open(path, encoding='utf-8') as f:
+                pages.append(scraper.parse_trainer_page(f.read(), parser='html.parser'))
+    assert pairs and pages
+    # Every list pair against every page, not just its own.
+    for sections in pages:
+        assert_same(pairs, sections)
+
+POKEMON = ['Pikachu', 'Charizard', 'Eevee', 'Mew', 'Mewtwo', 'Snivy', 'Serperior', 'Onix', 'Steelix',
+           'Nidoran', 'Rotom', 'Lycanroc', 'Venusaur', 'Meowth', 'Mr. Mime']
+FORMS = ['', ' (Gigantamax)', ' (Mega)', ' (Alolan Form)', ' (Midnight Form)', '♂', '♀']
+
+def random_name(rnd):
+    name = rnd.choice(POKEMON) + rnd.choice(FORMS)
+    if rnd.random() < 0.15:
+        name = rnd.choice(POKEMON) + ' → ' + name
+    return name
+
+def random_pair(rnd, sections):
+    if sections and rnd.random() < 0.5:
+        name = rnd.choice(sections)['pokemon_section']
+        name = rnd.choice([name, name.split('(')[0], name.split('→')[-1], name.upper()])
+    else:
+        name = random_name(rnd)
+    if rnd.random() < 0.2:
+        name = rnd.choice(['Mega ', 'Gigantamax ', '']) + name
+    anchor = ''
+    if rnd.random() < 0.6:
+        anchor = rnd.choice([name, random_name(rnd), rnd.choice(POKEMON)[:4]]).replace(' ', '_')
+    return {'pokemon_clean': scraper.normalize_pokemon(name).strip(), 'anchor': anchor}
+
+@pytest.mark.parametrize('seed', range(5))
+def test_matches_linear_scan_on_random_pages(seed):
+    rnd = random.Random(seed)
+    for _ in range(200):
+        sections = [{'pokemon_section': random_name(rnd)} for _ in range(rnd.randint(0, 6))]
+        assert_same([random_pair(rnd, sections) for _ in range(10)], sections)
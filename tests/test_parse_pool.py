@@ -0,0 +1,41 @@
+import glob
+import json
+import os
+
+import scraper
+from conftest import FIXTURES
+
+def fetched():
+    pages = []
+    for path in sorted(glob.glob(os.path.join(FIXTURES, '*_(Masters).html'))):
+        with open(path, encoding='utf-8') as f:
+            pages.append(('https://wiki.test/wiki/' + os.path.basename(path)[:-5], f.read()))
+    return pages + [('https://wiki.test/wiki/Gone_(Masters)', None)]
+
+def run(workers, capsys):
+    out = [(url, results, log) for url, _, results, log in scraper.iter_parsed_pages(fetched(), workers)]
+    capsys.readouterr()
+    return json.dumps(out)
+
+def test_pool_matches_serial(capsys, monkeypatch):
+    serial = run(0, capsys)
+    started = []
+    pool = scraper.ProcessPoolExecutor
+
+    def spawn_pool(*args, **kw):
+        started.append(kw['mp_context'].get_start_method())
+        return pool(*args, **kw)
+    monkeypatch.setattr(scraper, 'ProcessPoolExecutor', spawn_pool)
+    assert run(2, capsys) == serial
+    assert started == ['spawn']
+    assert '"Gone_(Masters)", null' in serial.replace('https://wiki.test/wiki/', '')
+
+def test_falls_back_when_pool_cannot_start(capsys, monkeypatch):
+    serial = run(0, capsys)
+
+    def no_pool(*args, **kw):
+        raise OSError("no semaphores")
+    monkeypatch.setattr(scraper, 'ProcessPoolExecutor', no_pool)
+    out = [(url, results, log) for url, _, results, log in scraper.iter_parsed_pages(fetched(), 2)]
+    assert 'process pool unavailable' in capsys.readouterr().out
+    assert json.dumps(out) == serial
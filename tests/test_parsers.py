@@ -0,0 +1,135 @@
+import glob
+import io
+import json
+import os
+from contextlib import redirect_stdout
+
+import pytest
+
+import scraper
+from conftest import FIXTURES
+
+# Red, Rosa and Brock (and the list page) are bench.py --generate output with
+# real titles; Leaf reproduces the markup of a page rendered by MediaWiki.
+PAGES = sorted(glob.glob(os.path.join(FIXTURES, '*_(Masters).html')))
+LIST_PAGE = os.path.join(FIXTURES, 'List_of_sync_pairs.html')
+BACKENDS = [b for b in scraper.HTML_PARSERS if scraper.parser_available(b)]
+
+def read(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+def parse_page(html, **kw):
+    with redirect_stdout(io.StringIO()):
+        results = scraper.parse_trainer_page(html, **kw)
+    assert results
+    return results
+
+def view(results):
+    return scraper.parity_view([], results)
+
+@pytest.mark.parametrize('path', PAGES, ids=os.path.basename)
+def test_trainer_page_backends_agree(path):
+    html = read(path)
+    ref = view(parse_page(html, parser='html.parser'))
+    for backend in BACKENDS:
+        assert view(parse_page(html, parser=backend)) == ref, backend
+
+@pytest.mark.parametrize('path', PAGES, ids=os.path.basename)
+def test_trainer_page_full_and_partial_agree(path):
+    html = read(path)
+    for backend in BACKENDS:
+        partial = parse_page(html, parser=backend, partial=True)
+        full = parse_page(html, parser=backend, partial=False)
+        assert json.dumps(partial) == json.dumps(full), backend
+
+def test_sync_pair_list_paths_agree():
+    html = read(LIST_PAGE)
+    ref = scraper.parse_sync_pair_list(html, parser='html.parser')
+    assert ref
+    for backend in BACKENDS:
+        assert scraper.parse_sync_pair_list(html, parser=backend) == ref, backend
+        assert scraper.parse_sync_pair_list(html, parser=backend, partial=False) == ref, backend
+    if scraper.lxml_html is not None:
+        assert scraper.parse_sync_pair_list(html, xpath=True) == ref
+
+@pytest.mark.parametrize('path', PAGES, ids=os.path.basename)
+def test_sections_are_hashed_from_source(path):
+    html = read(path)
+    first = parse_page(html, parser='html.parser')
+    assert all(s['section_hash'] for s in first)
+    assert [s['section_hash'] for s in parse_page(html, parser='html.parser')] == [s['section_hash'] for s in first]
+
+def test_section_hash_covers_parser_version(monkeypatch):
+    html = read(PAGES[0])
+    before = [s['section_hash'] for s in parse_page(html, parser='html.parser')]
+    monkeypatch.setattr(scraper, 'PARSER_VERSION', scraper.PARSER_VERSION + 1)
+    after = [s['section_hash'] for s in parse_page(html, parser='html.parser')]
+    assert not set(before) & set(after)
+
+def test_known_sections_are_reused():
+    html = read(PAGES[0])
+    first = parse_page(html, parser='html.parser')
+    known = {s['section_hash']: s for s in first}
+    with redirect_stdout(io.StringIO()) as out:
+        again = scraper.parse_trainer_page(html, parser='html.parser', known=known)
+    assert out.getvalue().count('(unchanged)') == len(first)
+    assert json.dumps(again) == json.dumps(first)
+
+def test_wiki_markup_page():
+    # Leaf_(Masters).html carries the markup MediaWiki emits around the
+    # data: tbody, edit-section links, legacy anchor spans, comments,
+    # TemplateStyles, references and nested infobox tables.
+    html = read(os.path.join(FIXTURES, 'Leaf_(Masters).html'))
+    assert scraper.extract_revision_id(html) == 3712345
+    for backend in BACKENDS:
+        eevee, mew = parse_page(html, parser=backend)
+        assert eevee['pokemon_section'] == 'Eevee' and eevee['trainer_variant'] == 'Leaf'
+        assert eevee['stats']['HP'] == '1204' and eevee['info']['weakness'] == 'Fighting'
+        assert [m['move_type'] for m in eevee['moves']] == ['Move', 'Move', 'Sync Move']
+        assert eevee['moves'][1]['name'] == "Leaf's Cheer Up!"
+        assert [s['name'] for s in eevee['theme_skills']] == ['Kanto: HP 40']
+        assert [g['energy_required'] for g in eevee['sync_grid']] == ['6', '12', '18']
+        assert mew['trainer_variant'] == 'Leaf (Anniversary 2022)'
+        assert mew['trainer_sprite'].endswith('800px-Spr_Masters_Leaf_Anniversary_2022.png')
+        assert mew['moves'][-1]['name'] == 'Fan-Favorite Psystrike' and not mew['sync_grid']
+
+def list_pairs():
+    with redirect_stdout(io.StringIO()):
+        return scraper.parse_sync_pair_list(read(LIST_PAGE), parser='html.parser')
+
+def selection(path, extras=True):
+    pages, pairs = list_pairs()
+    url = scraper.BASE_URL + '/wiki/' + os.path.basename(path)[:-5]
+    return scraper.page_selection(url, pages.get(url, os.path.basename(path).split('_')[0]),
+                                  [p for p in pairs if p['page_url'] == url], scraper.DexIndex([]),
+                                  extras=extras)
+
+@pytest.mark.parametrize('path', PAGES, ids=os.path.basename)
+def test_selected_sections_parse_like_full_page(path):
+    html = read(path)
+    full = parse_page(html, parser='html.parser')
+    for extras in (True, False):
+        select = selection(path, extras)
+        partial = parse_page(html, parser='html.parser', select=select)
+        assert [s['pokemon_section'] for s in partial] == [s['pokemon_section'] for s in full]
+        for p, f in zip(partial, full):
+            if p.get('parsed', True):
+                assert json.dumps(p) == json.dumps(f)
+            else:
+                assert p['section_hash'] is None
+
+def test_no_extras_parses_only_list_pairs():
+    path = os.path.join(FIXTURES, 'Brock_(Masters).html')
+    html = read(path)
+    without = selection(path, extras=False)
+    results = parse_page(html, parser='html.parser', select=without)
+    assert [s['pokemon_section'] for s in results if s.get('parsed', True)] == ['Onix', 'Tyranitar']
+    entries = scraper.build_page_entries(without, results)
+    assert [(e['pokemon'], e['_status']) for e in entries] == [('Onix', 'matched'), ('Tyranitar', 'matched')]
+    with_extras = selection(path)
+    results = parse_page(html, parser='html.parser', select=with_extras)
+    assert all(s.get('parsed', True) for s in results)
+    entries = scraper.build_page_entries(with_extras, results)
+    assert [(e['pokemon'], e['_status']) for e in entries] == [
+        ('Onix', 'matched'), ('Tyranitar', 'matched'), ('Geodude', 'extra_from_page')]
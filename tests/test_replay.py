@@ -0,0 +1,45 @@
+import hashlib
+import os
+
+import scraper
+from dexcore import OUTPUT_FILE, STORE_DIR, DexStore
+
+RUN = ['--parse-workers', '0', '--host-delay', '0', '--fixed-rate', '--no-cache', '--no-section-cache']
+
+def entries(root):
+    return list(DexStore(os.path.join(str(root), STORE_DIR)).iter_entries())
+
+def snapshot(root, skip):
+    files = {}
+    for dirpath, dirs, names in os.walk(str(root)):
+        dirs[:] = [d for d in dirs if os.path.join(dirpath, d) != os.path.join(str(root), skip)]
+        for name in names:
+            path = os.path.join(dirpath, name)
+            with open(path, 'rb') as f:
+                files[os.path.relpath(path, str(root))] = hashlib.sha256(f.read()).hexdigest()
+    return files
+
+def test_replay_reproduces_recording_outside_live_db(wiki, tmp_path, monkeypatch, capsys):
+    archive = str(tmp_path / 'run.jsonl.gz')
+    (tmp_path / 'rec').mkdir()
+    monkeypatch.chdir(tmp_path / 'rec')
+    scraper.main(RUN + ['--record', archive])
+    recorded = entries(tmp_path / 'rec')
+    assert len(recorded) > 2
+    requested = len(wiki)
+
+    # A live DB that only has the first pair: the replay has work to do.
+    live = tmp_path / 'live'
+    live.mkdir()
+    monkeypatch.chdir(live)
+    DexStore().commit(recorded[:1], {0})
+    scraper.export_legacy_json(recorded[:1])
+    before = snapshot(live, scraper.REPLAY_DIR)
+    del wiki[:]
+    scraper.main(RUN + ['--replay', archive, '--replay-dir', str(live / scraper.REPLAY_DIR)])
+    assert 'Replay: ' + str(requested) + ' responses' in capsys.readouterr().out
+    assert not wiki
+    assert snapshot(live, scraper.REPLAY_DIR) == before
+    assert entries(live / scraper.REPLAY_DIR) == recorded
+    assert os.path.exists(str(live / scraper.REPLAY_DIR / OUTPUT_FILE))
+    assert os.path.exists(str(live / scraper.REPLAY_DIR / 'masters_dex.sqlite'))
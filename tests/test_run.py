@@ -0,0 +1,34 @@
+import os
+
+import conftest
+import scraper
+from dexcore import OUTPUT_FILE, STORE_DIR, DexStore
+
+RUN = ['--parse-workers', '0', '--host-delay', '0', '--fixed-rate', '--no-cache', '--no-section-cache',
+       '--no-report', '--no-sqlite', '--no-columns', '--no-feed', '--no-api']
+
+def scrape(root, args):
+    os.makedirs(root)
+    os.chdir(root)
+    scraper.main(RUN + args)
+    return list(DexStore(os.path.join(root, STORE_DIR)).iter_entries())
+
+def test_no_extras_run_stores_only_list_pairs(wiki, tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    full = scrape(str(tmp_path / 'full'), [])
+    lean = scrape(str(tmp_path / 'lean'), ['--no-extras'])
+    assert [e['id'] for e in full if e['_status'] == 'extra_from_page'] == ['brock--geodude']
+    assert [e for e in full if e['_status'] != 'extra_from_page'] == lean
+
+def test_concurrent_fetch_matches_serial(wiki, tmp_path, monkeypatch, capsys):
+    # The first pages answer slowest, so concurrent fetches finish out of order.
+    monkeypatch.chdir(tmp_path)
+    for i, title in enumerate(['Red_(Masters)', 'Rosa_(Masters)', 'Brock_(Masters)']):
+        monkeypatch.setitem(conftest.PAGE_DELAYS, title, 0.3 - 0.1 * i)
+    serial = scrape(str(tmp_path / 'serial'), ['--serial'])
+    concurrent = scrape(str(tmp_path / 'concurrent'), ['--workers', '4'])
+    assert len(serial) > 2
+    assert concurrent == serial
+    with open(str(tmp_path / 'serial' / OUTPUT_FILE), 'rb') as a, \
+            open(str(tmp_path / 'concurrent' / OUTPUT_FILE), 'rb') as b:
+        assert a.read() == b.read()
@@ -0,0 +1,64 @@
+import io
+import json
+import os
+from contextlib import redirect_stdout
+
+import scraper
+from conftest import FIXTURES
+from metrics import METRICS
+
+def read_page(name='Red_(Masters).html'):
+    with open(os.path.join(FIXTURES, name), encoding='utf-8') as f:
+        return f.read()
+
+def parse_counted(html, cache):
+    METRICS.reset()
+    with redirect_stdout(io.StringIO()):
+        results = scraper.parse_trainer_page(html, parser='html.parser', cache=cache)
+    counts = METRICS.snapshot()['counters']
+    return results, counts.get('parse.cache_hits', 0), counts.get('parse.cache_misses', 0)
+
+def test_put_get_round_trip(tmp_path):
+    cache = scraper.SectionCache(str(tmp_path))
+    key = cache.key('html.parser', ['<table>a</table>'])
+    assert cache.get(key) is None
+    data = {k: [] for k in scraper.SECTION_FIELDS}
+    data.update(stats={'HP': '100'}, pokemon_section='Pikachu', section_hash='x')
+    cache.put(key, data)
+    assert cache.get(key) == {k: data[k] for k in scraper.SECTION_FIELDS}
+    assert cache.key('lxml', ['<table>a</table>']) != key
+    assert cache.key('html.parser', ['<table>b</table>']) != key
+    with open(cache._path(key), 'w', encoding='utf-8') as f:
+        f.write('{"stats": ')
+    assert cache.get(key) is None
+
+def test_parse_hits_after_first_miss(tmp_path):
+    html = read_page()
+    cache = scraper.SectionCache(str(tmp_path))
+    first, hits, misses = parse_counted(html, cache)
+    assert (hits, misses) == (0, len(first))
+    again, hits, misses = parse_counted(html, cache)
+    assert (hits, misses) == (len(first), 0)
+    assert json.dumps(again) == json.dumps(first)
+    plain, _, _ = parse_counted(html, None)
+    assert json.dumps(plain) == json.dumps(first)
+
+def test_parser_version_bump_invalidates(tmp_path, monkeypatch):
+    html = read_page()
+    root = str(tmp_path)
+    first, _, _ = parse_counted(html, scraper.SectionCache(root))
+    # Poison the cached entries, as an older parser with different output would.
+    for dirpath, _, files in os.walk(root):
+        for name in files:
+            with open(os.path.join(dirpath, name), 'w', encoding='utf-8') as f:
+                json.dump({k: [] for k in scraper.SECTION_FIELDS}, f)
+    stale, hits, _ = parse_counted(html, scraper.SectionCache(root))
+    assert hits == len(first) and not stale[0]['moves']
+    monkeypatch.setattr(scraper, 'PARSER_VERSION', scraper.PARSER_VERSION + 1)
+    cache = scraper.SectionCache(root)
+    fresh, hits, misses = parse_counted(html, cache)
+    assert (hits, misses) == (0, len(first))
+    assert [s['moves'] for s in fresh] == [s['moves'] for s in first]
+    assert cache.purge_stale() == 1
+    assert os.listdir(root) == ['v' + str(scraper.PARSER_VERSION)]
+    assert cache.purge_stale() == 0
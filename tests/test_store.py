@@ -0,0 +1,74 @@
+import os
+
+import pytest
+
+import dexcore
+import masters_dex
+from dexcore import DexStore, pair_id
+
+def entry(trainer, pokemon, attack):
+    return {'id': pair_id(trainer, pokemon), 'trainer': trainer, 'pokemon': pokemon,
+            'stats': {'Attack': str(attack)}}
+
+def test_read_api_uses_verified_store(tmp_path):
+    root = str(tmp_path / 'store')
+    db = [entry('Red', 'Pikachu', 300), entry('Rosa', 'Snivy♂', 250)]
+    DexStore(root).commit(db, set(range(len(db))))
+    dex = masters_dex.MastersDex.load(root)
+    assert [e['id'] for e in dex] == ['red--pikachu', 'rosa--snivy']
+    assert dex.count(pokemon='Snivy') == 1
+    with open(DexStore(root).log_path, 'r+b') as f:
+        f.write(b'[')
+    with pytest.raises(ValueError):
+        masters_dex.MastersDex.load(root)
+
+def test_unchanged_commit_leaves_store_untouched(tmp_path):
+    root = str(tmp_path / 'store')
+    db = [entry('Red', 'Pikachu', 300), entry('Rosa', 'Snivy', 250)]
+    store = DexStore(root)
+    assert store.commit(db, set(range(len(db)))) == 2
+    with open(store.manifest_path, 'rb') as f:
+        before = f.read()
+    assert DexStore(root).commit(db, {0, 1}) == 0
+    with open(store.manifest_path, 'rb') as f:
+        assert f.read() == before
+    db[1] = entry('Rosa', 'Snivy', 260)
+    assert DexStore(root).commit(db, {1}) == 1
+    assert [e['stats']['Attack'] for e in DexStore(root).iter_entries()] == ['300', '260']
+
+def rewrite(store, db, times):
+    for i in range(times):
+        db[0] = entry('Red', 'Pikachu', 300 + i)
+        store.commit(db, {0})
+
+def test_compaction_moves_to_a_new_log_generation(tmp_path):
+    root = str(tmp_path / 'store')
+    db = [entry('Red', 'Pikachu', 300), entry('Rosa', 'Snivy', 250)]
+    store = DexStore(root)
+    store.commit(db, {0, 1})
+    rewrite(store, db, 4)
+    assert store.manifest['generation'] >= 1
+    assert sorted(os.listdir(root)) == ['manifest.json', store.manifest['log']]
+    reopened = DexStore(root)
+    assert reopened.log_path == store.log_path
+    assert [e['stats']['Attack'] for e in reopened.iter_entries()] == ['303', '250']
+
+def test_crash_before_manifest_swap_keeps_old_snapshot(tmp_path, monkeypatch):
+    root = str(tmp_path / 'store')
+    db = [entry('Red', 'Pikachu', 300), entry('Rosa', 'Snivy', 250)]
+    store = DexStore(root)
+    store.commit(db, {0, 1})
+    rewrite(store, db, 1)
+    expected = [e['stats']['Attack'] for e in DexStore(root).iter_entries()]
+
+    def crash(path, data):
+        raise OSError("crash")
+    monkeypatch.setattr(dexcore, 'write_atomic', crash)
+    with pytest.raises(OSError):
+        store.compact()
+    monkeypatch.undo()
+    reopened = DexStore(root)
+    assert [e['stats']['Attack'] for e in reopened.iter_entries()] == expected
+    reopened.compact()
+    assert sorted(os.listdir(root)) == ['manifest.json', reopened.manifest['log']]
+    assert [e['stats']['Attack'] for e in DexStore(root).iter_entries()] == expected
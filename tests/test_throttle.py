@@ -0,0 +1,128 @@
+import threading
+import time
+
+import pytest
+import requests
+
+import scraper
+
+URL = 'http://host.test/wiki/Page'
+
+def take_slot(throttle, url, timeout=5):
+    done = threading.Event()
+
+    def run():
+        with throttle.slot(url):
+            pass
+        done.set()
+    threading.Thread(target=run, daemon=True).start()
+    return done.wait(timeout)
+
+def trip(throttle, url=URL):
+    for _ in range(scraper.BREAKER_MIN_SAMPLES):
+        throttle.observe(url, 500, 0.01)
+
+def test_breaker_opens_on_server_errors():
+    t = scraper.AdaptiveThrottle(delay=0, cooldown=60)
+    trip(t)
+    assert t.hosts['host.test']['state'] == 'open'
+
+def test_probe_success_closes_breaker():
+    t = scraper.AdaptiveThrottle(delay=0, cooldown=0.01)
+    trip(t)
+    time.sleep(0.02)
+    with t.slot(URL):
+        t.observe(URL, 200, 0.01)
+    assert t.hosts['host.test']['state'] == 'closed'
+    assert take_slot(t, URL)
+
+def test_probe_exception_does_not_block_host():
+    t = scraper.AdaptiveThrottle(delay=0, cooldown=0.01)
+    trip(t)
+    time.sleep(0.02)
+    with pytest.raises(RuntimeError):
+        with t.slot(URL):
+            raise RuntimeError("probe died before a response")
+    h = t.hosts['host.test']
+    assert not h['probing'] and h['state'] == 'open'
+    assert take_slot(t, URL)
+
+def test_too_many_trips_fail_fast():
+    t = scraper.AdaptiveThrottle(delay=0, cooldown=0)
+    trip(t)
+    t.hosts['host.test']['trips'] = scraper.BREAKER_MAX_TRIPS + 1
+    with pytest.raises(scraper.CircuitOpen):
+        with t.slot(URL):
+            pass
+
+def test_429_backs_off_without_tripping():
+    t = scraper.AdaptiveThrottle(delay=0.1, max_in_flight=2, max_limit=4)
+    for _ in range(scraper.BREAKER_WINDOW):
+        t.observe(URL, 429, 0.01, retry_after=0.2)
+    h = t.hosts['host.test']
+    assert h['state'] == 'closed'
+    assert h['limit'] == 1.0
+    assert h['delay'] >= 0.2
+
+def test_healthy_responses_raise_limit():
+    t = scraper.AdaptiveThrottle(delay=0.5, max_in_flight=1, max_limit=4)
+    for _ in range(50):
+        t.observe(URL, 200, 0.01)
+    h = t.hosts['host.test']
+    assert h['limit'] == 4.0
+    assert h['delay'] < 0.5
+
+class RaisingSession:
+    def __init__(self, exc):
+        self.exc = exc
+        self.calls = 0
+
+    def get(self, url, headers=None, timeout=None):
+        self.calls += 1
+        raise self.exc
+
+class Recorder:
+    def __init__(self):
+        self.seen = []
+
+    def observe(self, url, status, seconds, retry_after=None):
+        self.seen.append(status)
+
+def test_client_reports_request_exceptions():
+    client = scraper.HttpClient(retries=0)
+    client.session = RaisingSession(requests.exceptions.ChunkedEncodingError("torn body"))
+    client.observer = Recorder()
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        client.get(URL)
+    assert client.observer.seen == [None]
+
+def test_client_does_not_retry_invalid_requests(monkeypatch):
+    monkeypatch.setattr(scraper.time, 'sleep', lambda s: None)
+    client = scraper.HttpClient(retries=3)
+    client.session = RaisingSession(requests.exceptions.InvalidURL("bad url"))
+    with pytest.raises(requests.exceptions.InvalidURL):
+        client.get(URL)
+    assert client.session.calls == 1
+
+def test_throttle_backs_off_against_stand_in(stand_in, monkeypatch):
+    # Stand-in that answers 429 + Retry-After to every other request.
+    monkeypatch.setattr(scraper.time, 'sleep', lambda s: None)
+    hits = []
+
+    def handler(path, headers):
+        hits.append(path)
+        if len(hits) % 2:
+            return 429, {'Retry-After': '3'}, b''
+        return 200, {}, b'ok'
+    base = stand_in(handler)
+    t = scraper.AdaptiveThrottle(delay=0.2, max_in_flight=2, max_limit=4)
+    client = scraper.HttpClient(retries=2)
+    client.observer = t
+    for i in range(4):
+        with t.slot(base + '/p' + str(i)):
+            assert client.get(base + '/p' + str(i)).status_code == 200
+    h = t.hosts[base.split('//')[1]]
+    assert len(hits) == 8
+    assert h['state'] == 'closed'
+    assert h['delay'] >= 2.7
+    assert client.stats['retries'] == 4